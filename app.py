@@ -5,77 +5,817 @@ Flask Web Application for Gmail Consultation Report Generator
 Provides a web interface to process consultation emails and generate Excel reports.
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
+from flask import Flask, render_template, request, send_file, Response, stream_with_context
+from flask.json.provider import JSONProvider
 from datetime import datetime
 import logging
 import os
 import io
-from typing import List, Dict
-import pandas as pd
+import mmap
+import base64
+from typing import List, Optional
+from dataclasses import dataclass, replace
+import xlsxwriter
+from openpyxl import Workbook
 import queue
 import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import time
+import heapq
+from collections import OrderedDict, deque
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
 import uuid
+import string
+from html import escape
+import contextvars
+import contextlib
+import orjson
+from flask_compress import Compress
 
-from main import process_emails, EmailPair
+from main import (process_emails, normalize_date_range, pair_to_row, EmailPair, REPORT_COLUMNS, IMAP_POOL_SIZE,
+                  EXCEL_WORKBOOK_OPTIONS)
+
+# Log line format, shared by the console and the session log streams
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format=LOG_FORMAT
 )
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
+# gzip JSON responses only; compressing text/event-stream would buffer SSE messages
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 4
+Compress(app)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, so request.get_json() parses uploads in C."""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app.json = OrjsonProvider(app)
+
+
+# Sentinel for lookups where None is a valid value
+_MISSING = object()
+
+
+class ExpiringStore:
+    """
+    Thread-safe mapping bounded by size and idle time.
+    
+    Entries are kept in least-recently-used order: reading or touching an entry
+    moves it to the end, inserting past maxsize evicts from the front, and
+    sweep() evicts entries that have not been used for ttl seconds.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float, on_evict=None):
+        """
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry may stay unused before sweep() evicts it
+            on_evict: Optional callback(key, value) called for each evicted entry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # key -> [last_used, value]
+        self._lock = threading.Lock()
+    
+    def _evict(self, evicted):
+        if self.on_evict:
+            for key, value in evicted:
+                self.on_evict(key, value)
+    
+    def _trim(self):
+        evicted = []
+        while len(self._entries) > self.maxsize:
+            key, (_, value) = self._entries.popitem(last=False)
+            evicted.append((key, value))
+        return evicted
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            entry[0] = time.monotonic()
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def setdefault(self, key, default):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [time.monotonic(), default]
+                evicted = self._trim()
+            else:
+                entry[0] = time.monotonic()
+                self._entries.move_to_end(key)
+                evicted = []
+            value = entry[1]
+        self._evict(evicted)
+        return value
+    
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = [time.monotonic(), value]
+            self._entries.move_to_end(key)
+            evicted = self._trim()
+        self._evict(evicted)
+    
+    def touch(self, key):
+        """Mark an entry as used so sweep() keeps it."""
+        self.get(key)
+    
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+    
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+    
+    def values(self):
+        """Snapshot of the values; does not count as use."""
+        with self._lock:
+            return [entry[1] for entry in self._entries.values()]
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def sweep(self):
+        """Evict entries unused for longer than ttl."""
+        cutoff = time.monotonic() - self.ttl
+        evicted = []
+        with self._lock:
+            while self._entries:
+                key, (last_used, value) = next(iter(self._entries.items()))
+                if last_used > cutoff:
+                    break
+                del self._entries[key]
+                evicted.append((key, value))
+        self._evict(evicted)
+
+
+# Maximum number of sessions with a live log stream
+LOG_STREAM_MAX_SESSIONS = 256
+# Seconds a log stream may go unused (no SSE client attached) before it is evicted
+LOG_STREAM_TTL = 10 * 60
 
 # Store for streaming logs
-log_queues = {}
+# Format: {session_id: LogStream}
+# Evicted streams get the end sentinel so an SSE client still holding one exits
+log_queues = ExpiringStore(
+    maxsize=LOG_STREAM_MAX_SESSIONS,
+    ttl=LOG_STREAM_TTL,
+    on_evict=lambda session_id, log_stream: log_stream.put(None)
+)
+# Maximum number of undelivered log messages kept per session (oldest are dropped)
+LOG_STREAM_MAXLEN = 10000
+# Seconds of silence before the SSE stream sends a heartbeat
+SSE_HEARTBEAT_INTERVAL = 15
+# Maximum number of log messages coalesced into one SSE event
+SSE_MAX_BATCH = 64
+# Pre-encoded SSE frames sent as-is
+SSE_HEARTBEAT_FRAME = b": heartbeat\n\n"
+SSE_END_FRAME = "data: [종료] 로그 스트림이 종료되었습니다\n\n".encode('utf-8')
+
+@dataclass(slots=True)
+class RequestRecord:
+    """Tracked status of one report request; orjson serializes it like a dict."""
+    request_id: str
+    session_id: str
+    created_at: str
+    created_ts: float  # Numeric sort key for /api/requests
+    updated_at: str
+    status: str = 'pending'
+    email_count: int = 0  # Updated in background once the emails are counted
+    result_count: int = 0
+    error: Optional[str] = None
+    result_file: Optional[str] = None
+
+
+def remove_result_file(request_id: str, request_info: RequestRecord):
+    """Delete the result file of a request whose status entry was evicted."""
+    result_file = request_info.result_file
+    if result_file:
+        try:
+            os.remove(result_file)
+            logger.info(f"Removed result file of expired request {request_id}: {result_file}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to remove result file {result_file}: {e}")
+
+
+# Maximum number of requests whose status is tracked
+REQUEST_STATUS_MAX_ENTRIES = 1024
+# Seconds a request status is kept after it was last updated or read
+REQUEST_STATUS_TTL = 24 * 60 * 60
+
+# Default page size of /api/requests
+DEFAULT_REQUEST_LIST_LIMIT = 100
 
 # Store for request status tracking
-# Format: {request_id: {status, session_id, created_at, updated_at, email_count, result_count, error, result_file}}
-request_status = {}
+# Format: {request_id: RequestRecord}
+# The result file of an evicted request is deleted with it
+request_status = ExpiringStore(
+    maxsize=REQUEST_STATUS_MAX_ENTRIES,
+    ttl=REQUEST_STATUS_TTL,
+    on_evict=remove_result_file
+)
+
+# Maximum number of authenticated IMAP connections waiting for their worker
+IMAP_HANDOFF_MAX_CLIENTS = 64
+# Seconds /process's IMAP connection waits for the worker before it is closed
+IMAP_HANDOFF_TTL = 30
+
+# IMAP connections authenticated by /process, handed to the worker of the same request
+# Format: {request_id: GmailIMAPClient}
+# Kept apart from request_status since the status records are serialized as JSON
+imap_handoffs = ExpiringStore(
+    maxsize=IMAP_HANDOFF_MAX_CLIENTS,
+    ttl=IMAP_HANDOFF_TTL,
+    on_evict=lambda request_id, client: client.close()
+)
+
+# Maximum number of sessions whose report rows are cached
+REPORT_CACHE_MAX_ENTRIES = 64
+# Seconds cached report rows may go unused before they are evicted
+REPORT_CACHE_TTL = 30 * 60
+
+# Report rows cached per session so /download doesn't need the client to upload them again
+# Format: {session_id: rows}
+report_cache = ExpiringStore(maxsize=REPORT_CACHE_MAX_ENTRIES, ttl=REPORT_CACHE_TTL)
+
+# Rendered HTML of the static pages, filled on first request (not used in debug mode)
+# Format: {template_name: bytes}
+rendered_pages = {}
+
+# Seconds between sweeps of expired entries in the in-memory stores
+STORE_SWEEP_INTERVAL = 60
+
+# Required /process form fields and the error shown when each is missing, in check order
+REQUIRED_FIELDS = (
+    ('gmail_userid', '이메일 주소를 입력해주세요'),
+    ('gmail_password', '비밀번호를 입력해주세요'),
+    ('start_date', '시작일을 선택해주세요'),
+    ('end_date', '종료일을 선택해주세요'),
+)
+
+# Worker pool running report jobs, so /process returns without holding a worker for the IMAP work.
+# Requests beyond REPORT_WORKERS wait in the pool's queue with status 'pending'.
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', '4'))
+report_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='report')
+# IMAP connections each report job fetches with. The default splits main's pool size over the
+# workers; the jobs of one account also share main.IMAP_MAX_ACCOUNT_CONNECTIONS.
+JOB_IMAP_POOL_SIZE = int(os.environ.get('IMAP_POOL_SIZE', max(IMAP_POOL_SIZE // REPORT_WORKERS, 1)))
+# Pool for the output stage of report jobs (Excel file and completion email)
+REPORT_OUTPUT_WORKERS = 2
+report_output_executor = ThreadPoolExecutor(max_workers=REPORT_OUTPUT_WORKERS, thread_name_prefix='report-output')
+# Drop jobs that have not started yet when the server shuts down
+atexit.register(report_executor.shutdown, wait=False, cancel_futures=True)
+atexit.register(report_output_executor.shutdown, wait=False, cancel_futures=True)
+
+# Gmail SMTP server used for notification emails
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORT = 465
+# Maximum number of idle SMTP sessions kept for reuse
+SMTP_IDLE_MAX_SESSIONS = 16
+# Seconds an idle SMTP session is kept for the next job of the same account
+SMTP_IDLE_TTL = 2 * 60
+
+# Logged-in SMTP sessions left by finished jobs, reused by the next job of the same account
+# Format: {(gmail_userid, gmail_password): smtplib.SMTP_SSL}
+idle_smtp_sessions = ExpiringStore(
+    maxsize=SMTP_IDLE_MAX_SESSIONS,
+    ttl=SMTP_IDLE_TTL,
+    on_evict=lambda account, server: close_smtp(server)
+)
+
+# Worksheet name used for report workbooks
+REPORT_SHEET_NAME = '상담기록'
+
+# HTML bodies of the notification emails (string.Template, built once at import)
+START_EMAIL_TEMPLATE = string.Template("""
+    <html>
+    <body>
+        <h2>이메일 상담 보고서 처리가 시작되었습니다</h2>
+        <p>처리 정보:</p>
+        <ul>
+            <li><strong>기간:</strong> $start_date ~ $end_date</li>
+            <li><strong>대상 이메일 수:</strong> ${email_count}건</li>
+            <li><strong>예상 완료 시간:</strong> 약 ${estimated_minutes}분 ${estimated_seconds}초</li>
+            $request_info
+        </ul>
+        <p>처리가 완료되면 결과를 이메일로 보내드리겠습니다.</p>
+    </body>
+    </html>
+    """)
+
+COMPLETION_ROW_TEMPLATE = string.Template("""
+        <tr>
+            <td>$idx</td>
+            <td>$date</td>
+            <td>$start_time</td>
+            <td>$end_time</td>
+            <td>$student_name</td>
+            <td>$student_id</td>
+            <td>$subject</td>
+        </tr>
+        """)
+
+COMPLETION_EMAIL_TEMPLATE = string.Template("""
+    <html>
+    <head>
+        <style>
+            table {
+                border-collapse: collapse;
+                width: 100%;
+                margin-top: 20px;
+            }
+            th, td {
+                border: 1px solid #ddd;
+                padding: 8px;
+                text-align: left;
+            }
+            th {
+                background-color: #4CAF50;
+                color: white;
+            }
+            tr:nth-child(even) {
+                background-color: #f2f2f2;
+            }
+        </style>
+    </head>
+    <body>
+        <h2>이메일 상담 보고서 처리가 완료되었습니다</h2>
+        <p><strong>총 ${count}건의 상담 기록이 처리되었습니다.</strong></p>
+        $request_info
+        <p>상세 결과는 첨부된 엑셀 파일을 확인해주세요.</p>
+        
+        <h3>처리 결과 요약</h3>
+        <table>
+            <tr>
+                <th>번호</th>
+                <th>상담일</th>
+                <th>시작시간</th>
+                <th>종료시간</th>
+                <th>학생</th>
+                <th>학번</th>
+                <th>제목</th>
+            </tr>
+            $table_rows
+        </table>
+    </body>
+    </html>
+    """)
+
+# Directory to store result files (absolute, since send_file resolves relative paths against the app root);
+# RESULTS_DIR may point at a tmpfs such as /dev/shm, as results expire after REQUEST_STATUS_TTL anyway
+RESULTS_DIR = os.path.abspath(os.environ.get('RESULTS_DIR', 'results'))
+os.makedirs(RESULTS_DIR, exist_ok=True)
+
+# Maximum /download request body size in bytes (JSON table data uploaded by the client)
+MAX_DOWNLOAD_PAYLOAD = 8 * 1024 * 1024
+# Maximum number of rows a client may upload to /download
+MAX_DOWNLOAD_ROWS = 10_000
+# Cell value types an uploaded /download table may hold (the JSON scalars)
+UPLOAD_CELL_TYPES = (str, int, float, bool, type(None))
+
+# Chunk size used when streaming Excel downloads to the client
+EXCEL_CHUNK_SIZE = 64 * 1024
+# Number of chunks buffered between the Excel worker and the response (double buffering)
+EXCEL_STREAM_BUFFERS = 2
+
+
+class LogStream:
+    """
+    Bounded buffer of log messages for one SSE session.
+    
+    deque append/popleft are atomic, so the producer only has to set an Event to
+    wake the consumer instead of going through queue.Queue's lock and Condition.
+    """
+    
+    def __init__(self, maxlen: int = LOG_STREAM_MAXLEN):
+        self.messages = deque(maxlen=maxlen)
+        self.event = threading.Event()
+    
+    def put(self, msg):
+        """Append a message (a RequestRecord is the final status, None ends the stream) and wake the consumer."""
+        self.messages.append(msg)
+        self.event.set()
+    
+    def put_many(self, msgs):
+        """Append several messages with a single wake-up of the consumer."""
+        self.messages.extend(msgs)
+        self.event.set()
+    
+    def wait(self, timeout: float) -> bool:
+        """Wait for new messages. Returns False if the timeout expired."""
+        signaled = self.event.wait(timeout)
+        # Clear before the caller drains so a put racing with the drain is not lost
+        self.event.clear()
+        return signaled
+
 
-# Directory to store result files
-RESULTS_DIR = "results"
-if not os.path.exists(RESULTS_DIR):
-    os.makedirs(RESULTS_DIR)
+def sweep_results_dir():
+    """
+    Delete result files older than REQUEST_STATUS_TTL.
+    
+    Evicting a request removes its file, but files left over from a previous
+    server run (or unfinished .tmp files) have no status entry to evict.
+    """
+    cutoff = time.time() - REQUEST_STATUS_TTL
+    with os.scandir(RESULTS_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    logger.info(f"Removed expired result file: {entry.path}")
+            except FileNotFoundError:
+                pass
 
 
-class QueueHandler(logging.Handler):
-    """Custom logging handler that puts log records into a queue."""
+def sweep_stores():
+    """Periodically evict expired entries from the in-memory stores (runs in a daemon thread)."""
+    while True:
+        time.sleep(STORE_SWEEP_INTERVAL)
+        try:
+            log_queues.sweep()
+            request_status.sweep()
+            imap_handoffs.sweep()
+            idle_smtp_sessions.sweep()
+            report_cache.sweep()
+            sweep_results_dir()
+        except Exception as e:
+            logger.exception(f"Error sweeping stores: {e}")
+
+
+threading.Thread(target=sweep_stores, name='store-sweeper', daemon=True).start()
+
+
+def render_page(template_name: str, status: int = 200) -> Response:
+    """
+    Render a static page, caching the rendered HTML outside debug mode.
     
-    def __init__(self, log_queue):
-        super().__init__()
-        self.log_queue = log_queue
+    The pages take no template context, so Jinja only has to run once per template;
+    in debug mode they are re-rendered so template edits show up immediately.
+    
+    Args:
+        template_name: Template file name
+        status: HTTP status code
+        
+    Returns:
+        Flask Response with the rendered HTML
+    """
+    html = None if app.debug else rendered_pages.get(template_name)
+    if html is None:
+        html = render_template(template_name).encode('utf-8')
+        if not app.debug:
+            rendered_pages[template_name] = html
+    return app.response_class(html, status=status, mimetype='text/html')
+
+
+def json_response(obj, status: int = 200) -> Response:
+    """
+    Serialize obj with orjson into a JSON response.
+    
+    orjson is several times faster than the stdlib encoder used by jsonify and
+    writes Hangul as UTF-8 instead of \\uXXXX escapes.
+    
+    Args:
+        obj: JSON-serializable object
+        status: HTTP status code
+        
+    Returns:
+        Flask Response with an application/json body
+    """
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+def get_log_stream(session_id: str) -> LogStream:
+    """Return the log stream for a session, creating it if needed."""
+    log_stream = log_queues.get(session_id)
+    if log_stream is None:
+        log_stream = log_queues.setdefault(session_id, LogStream())
+    return log_stream
+
+
+def end_log_stream(session_id: str, done: RequestRecord = None):
+    """
+    End a session's log stream, if it still exists.
+    
+    Args:
+        session_id: Session whose stream to end
+        done: Optional final status, sent to the client as an SSE 'done' event
+    """
+    log_stream = log_queues.get(session_id)
+    if log_stream is not None:
+        if done is not None:
+            log_stream.put(done)
+        log_stream.put(None)
+
+
+def format_sse_event(messages: List[str]) -> bytes:
+    """Format log messages as a single encoded SSE event with one data line per log line."""
+    lines = [line for msg in messages for line in (str(msg).splitlines() or [''])]
+    return ("data: " + "\ndata: ".join(lines) + "\n\n").encode('utf-8')
+
+
+# Log stream of the session whose work is running in the current context
+current_log_stream = contextvars.ContextVar('current_log_stream', default=None)
+
+
+class QueueRouterHandler(logging.Handler):
+    """
+    Logging handler that routes records to the current session's LogStream.
+    
+    A single instance stays attached to the root logger; the target stream is
+    looked up from current_log_stream, so concurrent requests neither mutate
+    the handler lists nor receive each other's logs.
+    """
     
     def emit(self, record):
+        log_queue = current_log_stream.get()
+        if log_queue is None:
+            return
         try:
-            msg = self.format(record)
-            # Check if this is a progress message and format accordingly
-            if 'PROGRESS|' in msg:
-                # Extract progress information
-                parts = msg.split('PROGRESS|')
-                if len(parts) > 1:
-                    progress_data = parts[1].strip()
-                    # Send both the formatted log and the progress data separately
-                    self.log_queue.put(msg)
-                    self.log_queue.put(f"__PROGRESS__{progress_data}")
-                else:
-                    self.log_queue.put(msg)
+            # Progress records carry their data in the 'progress' extra; plain
+            # "PROGRESS|..." messages are still recognized for other callers
+            progress_data = getattr(record, 'progress', None)
+            if progress_data is None and isinstance(record.msg, str) and record.msg.startswith('PROGRESS|'):
+                # Only merge the args once the unformatted message is known to be a progress line
+                progress_data = record.getMessage().partition('PROGRESS|')[2].strip()
+            
+            # Send the formatted log and, for progress records, the progress data in one batch
+            message = self.format(record)
+            if progress_data is None:
+                log_queue.put(message)
             else:
-                self.log_queue.put(msg)
+                log_queue.put_many((message, f"__PROGRESS__{progress_data}"))
         except Exception:
             self.handleError(record)
 
 
+queue_router_handler = QueueRouterHandler()
+queue_router_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+queue_router_handler.setLevel(logging.INFO)
+logging.getLogger().addHandler(queue_router_handler)
+
+
+@contextlib.contextmanager
+def session_logging(session_id: str):
+    """
+    Route log records emitted in this context to the session's log stream.
+    
+    Args:
+        session_id: Session to stream logs to; if empty, logs are not streamed
+        
+    Yields:
+        The session's LogStream, or None without a session
+    """
+    if not session_id:
+        yield None
+        return
+    log_stream = get_log_stream(session_id)
+    token = current_log_stream.set(log_stream)
+    try:
+        yield log_stream
+    finally:
+        current_log_stream.reset(token)
+
+
+class ExcelChunkPipe:
+    """Write-only file object that hands fixed-size chunks to a bounded queue."""
+    
+    def __init__(self, chunk_queue, cancelled):
+        self.chunk_queue = chunk_queue
+        self.cancelled = cancelled
+        self._buffer = bytearray()
+        self._aborted = False
+    
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= EXCEL_CHUNK_SIZE:
+            self._put(bytes(self._buffer[:EXCEL_CHUNK_SIZE]))
+            del self._buffer[:EXCEL_CHUNK_SIZE]
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+    
+    def _put(self, chunk):
+        # Block while the consumer is behind, but give up once it has gone away
+        while True:
+            if self.cancelled.is_set():
+                if self._aborted:
+                    # Writer is unwinding (e.g. zip cleanup); drop remaining output
+                    return
+                self._aborted = True
+                raise IOError("Excel stream was cancelled by the client")
+            try:
+                self.chunk_queue.put(chunk, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+
+def report_timestamp(now: datetime, with_time: bool = True) -> str:
+    """
+    Format a timestamp for report file names (YYYYMMDD or YYYYMMDD_HHMMSS).
+    
+    Built from the datetime fields directly, which is cheaper than strftime.
+    """
+    date_part = f"{now.year:04d}{now.month:02d}{now.day:02d}"
+    if not with_time:
+        return date_part
+    return f"{date_part}_{now.hour:02d}{now.minute:02d}{now.second:02d}"
+
+
+def update_request_status(request_id: str, **fields):
+    """
+    Update fields of a tracked request and stamp its updated_at time.
+    
+    Does nothing if request_id is empty or no longer tracked.
+    
+    Args:
+        request_id: Request to update
+        **fields: Status fields to set
+    """
+    if not request_id:
+        return
+    request_info = request_status.get(request_id)
+    if request_info is not None:
+        for name, value in fields.items():
+            setattr(request_info, name, value)
+        request_info.updated_at = datetime.now().isoformat()
+
+
+def hand_off_imap_client(request_id: str, client):
+    """
+    Keep an authenticated IMAP client for the worker of a request.
+    
+    If the worker hasn't taken it within IMAP_HANDOFF_TTL seconds, the store
+    sweep evicts and closes it.
+    
+    Args:
+        request_id: Request whose worker will take the client
+        client: Connected GmailIMAPClient
+    """
+    imap_handoffs[request_id] = client
+
+
+def release_imap_client(request_id: str):
+    """Close the handed-off IMAP client of a request if no worker has taken it."""
+    client = imap_handoffs.pop(request_id)
+    if client is not None:
+        logger.info(f"Closing unclaimed IMAP connection of request {request_id}")
+        client.close()
+
+
+def take_imap_client(request_id: str):
+    """
+    Take the IMAP client handed off for a request, if it is still usable.
+    
+    Args:
+        request_id: Request whose client to take
+    
+    Returns:
+        Connected GmailIMAPClient, or None if there is none or its connection has dropped
+    """
+    client = imap_handoffs.pop(request_id) if request_id else None
+    if client is None:
+        return None
+    try:
+        client.connection.noop()
+        return client
+    except Exception as e:
+        logger.warning(f"Handed-off IMAP connection is no longer usable: {e}")
+        client.close()
+        return None
+
+
+def connect_smtp(gmail_userid: str, gmail_password: str) -> smtplib.SMTP_SSL:
+    """Open an authenticated connection to the Gmail SMTP server."""
+    server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT)
+    server.login(gmail_userid, gmail_password)
+    return server
+
+
+def close_smtp(server: smtplib.SMTP_SSL):
+    """Close an SMTP connection, ignoring errors from an already dropped one."""
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+def acquire_smtp(gmail_userid: str, gmail_password: str) -> smtplib.SMTP_SSL:
+    """Take the account's idle SMTP session if there is one, otherwise open a new connection."""
+    server = idle_smtp_sessions.pop((gmail_userid, gmail_password))
+    if server is not None:
+        try:
+            ensure_smtp_connection(server, gmail_userid, gmail_password)
+            logger.info("Reusing idle SMTP session")
+            return server
+        except Exception as e:
+            logger.warning(f"Idle SMTP session could not be reused: {e}")
+            server.close()
+    return connect_smtp(gmail_userid, gmail_password)
+
+
+def release_smtp(server: smtplib.SMTP_SSL, gmail_userid: str, gmail_password: str):
+    """Keep a job's SMTP session for the next job of the same account (closed after SMTP_IDLE_TTL)."""
+    previous = idle_smtp_sessions.pop((gmail_userid, gmail_password))
+    idle_smtp_sessions[(gmail_userid, gmail_password)] = server
+    if previous is not None:
+        close_smtp(previous)
+
+
+def ensure_smtp_connection(server: smtplib.SMTP_SSL, gmail_userid: str, gmail_password: str):
+    """Check a reused SMTP connection with NOOP and reconnect it in place if it has dropped."""
+    try:
+        if server.noop()[0] == 250:
+            return
+    except OSError:  # smtplib errors, including SMTPServerDisconnected
+        pass
+    logger.info("SMTP connection was closed, reconnecting")
+    server.close()
+    server.connect(SMTP_HOST, SMTP_PORT)
+    # close() keeps the old session's EHLO reply, so login() would skip EHLO on the new one
+    server.ehlo()
+    server.login(gmail_userid, gmail_password)
+
+
+def build_attachment(path: str, data=None) -> MIMEBase:
+    """
+    Build a base64 MIME attachment part for a file.
+    
+    If the file contents are already in memory they are encoded directly;
+    otherwise the file is memory-mapped and encoded in one pass, so its
+    contents are not first copied into a Python bytes object.
+    
+    Args:
+        path: Path to the file to attach (also gives the attachment's filename)
+        data: Optional bytes-like contents of the file, to skip reading it back
+        
+    Returns:
+        MIME part ready to attach to a message
+    """
+    part = MIMEBase('application', 'octet-stream')
+    if data is not None:
+        encoded = base64.encodebytes(data)
+    else:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    encoded = base64.encodebytes(mapped)
+            else:
+                encoded = b''  # mmap cannot map an empty file
+    part.set_payload(encoded.decode('ascii'))
+    part['Content-Transfer-Encoding'] = 'base64'
+    filename = os.path.basename(path)
+    part.add_header('Content-Disposition', f'attachment; filename={filename}')
+    return part
+
+
 def send_email_via_smtp(gmail_userid: str, gmail_password: str, to_email: str, 
-                        subject: str, body: str, attachment_path: str = None) -> bool:
+                        subject: str, body: str, attachment_path: str = None,
+                        server: smtplib.SMTP_SSL = None, attachment_data=None) -> bool:
     """
     Send an email via Gmail SMTP.
     
@@ -86,6 +826,8 @@ def send_email_via_smtp(gmail_userid: str, gmail_password: str, to_email: str,
         subject: Email subject
         body: Email body (HTML supported)
         attachment_path: Optional path to file to attach
+        server: Optional logged-in connection to reuse; a new one is opened and closed otherwise
+        attachment_data: Optional in-memory contents of attachment_path, attached instead of reading the file
         
     Returns:
         True if email sent successfully, False otherwise
@@ -101,19 +843,19 @@ def send_email_via_smtp(gmail_userid: str, gmail_password: str, to_email: str,
         msg.attach(MIMEText(body, 'html', 'utf-8'))
         
         # Attach file if provided
-        if attachment_path and os.path.exists(attachment_path):
-            with open(attachment_path, 'rb') as f:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(f.read())
-                encoders.encode_base64(part)
-                filename = os.path.basename(attachment_path)
-                part.add_header('Content-Disposition', f'attachment; filename={filename}')
-                msg.attach(part)
-        
-        # Connect to Gmail SMTP server
-        logger.info(f"Connecting to Gmail SMTP server to send email to {to_email}")
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(gmail_userid, gmail_password)
+        if attachment_path:
+            try:
+                msg.attach(build_attachment(attachment_path, attachment_data))
+            except FileNotFoundError:
+                logger.error(f"Attachment not found, sending without it: {attachment_path}")
+        
+        if server is None:
+            # Connect to Gmail SMTP server
+            logger.info(f"Connecting to Gmail SMTP server to send email to {to_email}")
+            with connect_smtp(gmail_userid, gmail_password) as server:
+                server.send_message(msg)
+        else:
+            ensure_smtp_connection(server, gmail_userid, gmail_password)
             server.send_message(msg)
         
         logger.info(f"Email sent successfully to {to_email}")
@@ -125,7 +867,8 @@ def send_email_via_smtp(gmail_userid: str, gmail_password: str, to_email: str,
 
 
 def send_start_notification(gmail_userid: str, gmail_password: str, 
-                           start_date: str, end_date: str, email_count: int, request_id: str = None):
+                           start_date: str, end_date: str, email_count: int, request_id: str = None,
+                           server: smtplib.SMTP_SSL = None):
     """
     Send notification email when processing starts.
     
@@ -136,6 +879,7 @@ def send_start_notification(gmail_userid: str, gmail_password: str,
         end_date: End date string
         email_count: Number of emails to process
         request_id: Request ID for tracking (optional)
+        server: SMTP connection to reuse (optional)
     """
     estimated_time = email_count * 2  # 2 seconds per email
     estimated_minutes = estimated_time // 60
@@ -143,107 +887,73 @@ def send_start_notification(gmail_userid: str, gmail_password: str,
     
     request_info = ""
     if request_id:
-        request_info = f"<li><strong>요청 ID:</strong> {request_id}</li>"
+        request_info = f"<li><strong>요청 ID:</strong> {escape(request_id)}</li>"
     
     subject = "이메일 상담 보고서 처리 시작"
-    body = f"""
-    <html>
-    <body>
-        <h2>이메일 상담 보고서 처리가 시작되었습니다</h2>
-        <p>처리 정보:</p>
-        <ul>
-            <li><strong>기간:</strong> {start_date} ~ {end_date}</li>
-            <li><strong>대상 이메일 수:</strong> {email_count}건</li>
-            <li><strong>예상 완료 시간:</strong> 약 {estimated_minutes}분 {estimated_seconds}초</li>
-            {request_info}
-        </ul>
-        <p>처리가 완료되면 결과를 이메일로 보내드리겠습니다.</p>
-    </body>
-    </html>
-    """
+    body = START_EMAIL_TEMPLATE.substitute(
+        start_date=escape(start_date),
+        end_date=escape(end_date),
+        email_count=email_count,
+        estimated_minutes=estimated_minutes,
+        estimated_seconds=estimated_seconds,
+        request_info=request_info
+    )
     
-    send_email_via_smtp(gmail_userid, gmail_password, gmail_userid, subject, body)
+    send_email_via_smtp(gmail_userid, gmail_password, gmail_userid, subject, body, server=server)
 
 
-def send_completion_notification(gmail_userid: str, gmail_password: str, 
-                                 pairs: List[EmailPair], excel_path: str, request_id: str = None):
+def render_completion_email(pairs: List[EmailPair], request_id: str = None) -> str:
     """
-    Send notification email when processing completes with Excel attachment.
+    Render the HTML body of the completion notification email.
     
     Args:
-        gmail_userid: Gmail account
-        gmail_password: Gmail app password
         pairs: List of processed email pairs
-        excel_path: Path to Excel file to attach
         request_id: Request ID for tracking (optional)
+        
+    Returns:
+        HTML body listing the consultation records
     """
-    # Create HTML table from pairs
-    table_rows = ""
-    for idx, pair in enumerate(pairs, 1):
-        table_rows += f"""
-        <tr>
-            <td>{idx}</td>
-            <td>{pair.get_date()}</td>
-            <td>{pair.get_start_time()}</td>
-            <td>{pair.get_end_time()}</td>
-            <td>{pair.get_student_name()}</td>
-            <td>{pair.get_student_id()}</td>
-            <td>{pair.get_request_subject()}</td>
-        </tr>
-        """
+    # Create HTML table from pairs (email-derived text is escaped so it cannot inject markup)
+    table_rows = ''.join(
+        COMPLETION_ROW_TEMPLATE.substitute(
+            idx=idx,
+            date=escape(pair.get_date()),
+            start_time=escape(pair.get_start_time()),
+            end_time=escape(pair.get_end_time()),
+            student_name=escape(pair.get_student_name()),
+            student_id=escape(pair.get_student_id()),
+            subject=escape(str(pair.get_request_subject()))
+        )
+        for idx, pair in enumerate(pairs, 1)
+    )
     
     request_info = ""
     if request_id:
-        request_info = f"<p><strong>요청 ID:</strong> {request_id}</p>"
+        request_info = f"<p><strong>요청 ID:</strong> {escape(request_id)}</p>"
     
-    subject = "이메일 상담 보고서 처리 완료"
-    body = f"""
-    <html>
-    <head>
-        <style>
-            table {{
-                border-collapse: collapse;
-                width: 100%;
-                margin-top: 20px;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-                padding: 8px;
-                text-align: left;
-            }}
-            th {{
-                background-color: #4CAF50;
-                color: white;
-            }}
-            tr:nth-child(even) {{
-                background-color: #f2f2f2;
-            }}
-        </style>
-    </head>
-    <body>
-        <h2>이메일 상담 보고서 처리가 완료되었습니다</h2>
-        <p><strong>총 {len(pairs)}건의 상담 기록이 처리되었습니다.</strong></p>
-        {request_info}
-        <p>상세 결과는 첨부된 엑셀 파일을 확인해주세요.</p>
-        
-        <h3>처리 결과 요약</h3>
-        <table>
-            <tr>
-                <th>번호</th>
-                <th>상담일</th>
-                <th>시작시간</th>
-                <th>종료시간</th>
-                <th>학생</th>
-                <th>학번</th>
-                <th>제목</th>
-            </tr>
-            {table_rows}
-        </table>
-    </body>
-    </html>
+    return COMPLETION_EMAIL_TEMPLATE.substitute(
+        count=len(pairs),
+        request_info=request_info,
+        table_rows=table_rows
+    )
+
+
+def send_completion_notification(gmail_userid: str, gmail_password: str, body: str, excel_path: str,
+                                 server: smtplib.SMTP_SSL = None, excel_data=None):
     """
+    Send notification email when processing completes with Excel attachment.
     
-    send_email_via_smtp(gmail_userid, gmail_password, gmail_userid, subject, body, excel_path)
+    Args:
+        gmail_userid: Gmail account
+        gmail_password: Gmail app password
+        body: HTML body from render_completion_email
+        excel_path: Path to Excel file to attach
+        server: SMTP connection to reuse (optional)
+        excel_data: In-memory contents of the Excel file, attached instead of reading excel_path (optional)
+    """
+    subject = "이메일 상담 보고서 처리 완료"
+    send_email_via_smtp(gmail_userid, gmail_password, gmail_userid, subject, body, excel_path,
+                        server=server, attachment_data=excel_data)
 
 
 def process_emails_background(gmail_userid: str, gmail_password: str, 
@@ -257,6 +967,9 @@ def process_emails_background(gmail_userid: str, gmail_password: str,
     """
     Process emails in background thread and send notification emails.
     
+    Once the pairs are found, writing the Excel file and sending the completion
+    email continue in write_report_output on report_output_executor.
+    
     Args:
         gmail_userid: Gmail account
         gmail_password: Gmail app password
@@ -271,193 +984,316 @@ def process_emails_background(gmail_userid: str, gmail_password: str,
         session_id: Optional session ID for logging
         request_id: Optional request ID for tracking
     """
-    queue_handler = None
-    
-    try:
-        # Update request status to processing
-        if request_id and request_id in request_status:
-            request_status[request_id]['status'] = 'processing'
-            request_status[request_id]['updated_at'] = datetime.now().isoformat()
+    # Route this thread's log records to the session stream, if one was given
+    with session_logging(session_id) as log_queue:
+        smtp_server = None
+        handed_off = False
+        emails = None
         
-        # Set up logging to queue if session_id is provided
-        if session_id:
-            # Ensure queue exists for this session
-            log_queue = log_queues.get(session_id, None)
-
-            if log_queue is None:
-                log_queue = queue.Queue()
-                log_queues[session_id] = log_queue
-
-            queue_handler = QueueHandler(log_queue)
-            queue_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-            
-            # Add handler to root logger and main module logger
-            root_logger = logging.getLogger()
-            main_logger = logging.getLogger('main')
-            app_logger = logging.getLogger(__name__)
+        try:
+            # Update request status to processing
+            update_request_status(request_id, status='processing')
             
-            # Set the level to INFO to ensure all messages are captured
-            queue_handler.setLevel(logging.INFO)
+            # Send initial message to stream
+            if log_queue is not None:
+                log_queue.put("백그라운드 처리가 시작되었습니다...")
             
-            root_logger.addHandler(queue_handler)
-            main_logger.addHandler(queue_handler)
-            app_logger.addHandler(queue_handler)
+            # Calculate email count if not provided (email_count = 0)
+            if email_count == 0:
+                logger.info("이메일 수를 계산하고 있습니다...")
+                client = None
+                try:
+                    # Reuse the connection /process authenticated, if it is still open
+                    client = take_imap_client(request_id)
+                    if client is None:
+                        from main import GmailIMAPClient
+                        logger.info("Gmail IMAP 클라이언트를 초기화하고 있습니다...")
+                        client = GmailIMAPClient(gmail_userid, gmail_password, pool_size=JOB_IMAP_POOL_SIZE)
+                        logger.info("Gmail 서버에 연결 중입니다...")
+                        connect_result = client.connect()
+                        if connect_result is not True:
+                            logger.error(f"Gmail 연결 실패: {connect_result}")
+                            update_request_status(request_id, status='failed', error=f'Gmail 연결 실패: {connect_result}')
+                            return
+                    logger.info("Gmail에 연결되었습니다. 이메일을 검색하고 있습니다...")
+                    logger.info(f"검색 기간: {start_date_str} ~ {end_date_str}")
+                    
+                    # Fetch with process_emails' date range so the same emails can be processed below
+                    emails = client.fetch_pair_candidates(*normalize_date_range(start_date, end_date))
+                    # Every email in the range counts, not only the downloaded pair candidates
+                    email_count = client.messages_in_range
+                    logger.info(f"이메일 검색이 완료되었습니다. 총 {email_count}건의 이메일을 찾았습니다")
+                    logger.info(f"처리할 이메일 {email_count}건을 찾았습니다")
+                    
+                    # Update request status with email count
+                    update_request_status(request_id, email_count=email_count)
+                        
+                except Exception as e:
+                    logger.exception(f"이메일 수 계산 중 오류: {e}")
+                    update_request_status(request_id, status='failed', error=f'이메일 수 계산 실패: {str(e)}')
+                    return
+                finally:
+                    if client is not None:
+                        client.close()
+                        logger.info("Gmail 연결을 종료했습니다")
+            else:
+                # The count was given, so the connection /process handed off goes unused
+                release_imap_client(request_id)
             
-            # Send initial message to stream
-            log_queue.put("백그라운드 처리가 시작되었습니다...")
-        
-        # Calculate email count if not provided (email_count = 0)
-        if email_count == 0:
-            logger.info("이메일 수를 계산하고 있습니다...")
+            # One SMTP session serves both notifications (each send falls back to its own connection on failure)
             try:
-                from main import GmailIMAPClient
-                logger.info("Gmail IMAP 클라이언트를 초기화하고 있습니다...")
-                client = GmailIMAPClient(gmail_userid, gmail_password)
-                logger.info("Gmail 서버에 연결 중입니다...")
-                connect_result = client.connect()
-                if connect_result is not True:
-                    logger.error(f"Gmail 연결 실패: {connect_result}")
-                    if request_id and request_id in request_status:
-                        request_status[request_id]['status'] = 'failed'
-                        request_status[request_id]['error'] = f'Gmail 연결 실패: {connect_result}'
-                        request_status[request_id]['updated_at'] = datetime.now().isoformat()
-                    return
-                logger.info("Gmail에 연결되었습니다. 이메일을 검색하고 있습니다...")
-                logger.info(f"검색 기간: {start_date_str} ~ {end_date_str}")
-                
-                emails = client.fetch_emails(start_date, end_date)
-                email_count = len(emails)
-                logger.info(f"이메일 검색이 완료되었습니다. 총 {email_count}건의 이메일을 찾았습니다")
-                client.close()
-                logger.info("Gmail 연결을 종료했습니다")
-                
-                logger.info(f"처리할 이메일 {email_count}건을 찾았습니다")
-                
-                # Update request status with email count
-                if request_id and request_id in request_status:
-                    request_status[request_id]['email_count'] = email_count
-                    request_status[request_id]['updated_at'] = datetime.now().isoformat()
-                    
+                smtp_server = acquire_smtp(gmail_userid, gmail_password)
             except Exception as e:
-                logger.exception(f"이메일 수 계산 중 오류: {e}")
-                if request_id and request_id in request_status:
-                    request_status[request_id]['status'] = 'failed'
-                    request_status[request_id]['error'] = f'이메일 수 계산 실패: {str(e)}'
-                    request_status[request_id]['updated_at'] = datetime.now().isoformat()
+                logger.error(f"Failed to connect to SMTP server: {e}")
+            
+            # Send start notification email
+            logger.info("시작 알림 이메일을 전송하고 있습니다...")
+            send_start_notification(gmail_userid, gmail_password, start_date_str, end_date_str, email_count, request_id,
+                                    server=smtp_server)
+            logger.info("시작 알림 이메일이 전송되었습니다")
+            
+            # Process emails
+            logger.info("이메일 처리를 시작합니다: %s ~ %s", start_date_str, end_date_str)
+            logger.info("엄격 모드: %s", '활성화' if strict_mode else '비활성화')
+            pairs, error = process_emails(
+                gmail_userid,
+                gmail_password,
+                start_date,
+                end_date,
+                keywords=keywords,
+                student_id_length=student_id_length,
+                strict_mode=strict_mode,
+                emails=emails,  # Already fetched when counting; None makes process_emails fetch them
+                pool_size=JOB_IMAP_POOL_SIZE
+            )
+            
+            if error:
+                logger.error(f"이메일 처리 중 오류가 발생했습니다: {error}")
+                # Update request status to failed
+                update_request_status(request_id, status='failed', error=str(error))
                 return
-        
-        # Send start notification email
-        logger.info("시작 알림 이메일을 전송하고 있습니다...")
-        send_start_notification(gmail_userid, gmail_password, start_date_str, end_date_str, email_count, request_id)
-        logger.info("시작 알림 이메일이 전송되었습니다")
-        
-        # Process emails
-        logger.info("이메일 처리를 시작합니다: %s ~ %s", start_date_str, end_date_str)
-        logger.info("엄격 모드: %s", '활성화' if strict_mode else '비활성화')
-        pairs, error = process_emails(
-            gmail_userid,
-            gmail_password,
-            start_date,
-            end_date,
-            keywords=keywords,
-            student_id_length=student_id_length,
-            strict_mode=strict_mode
-        )
-        
-        if error:
-            logger.error(f"이메일 처리 중 오류가 발생했습니다: {error}")
+            
+            if not pairs:
+                logger.warning("상담 기록을 찾을 수 없습니다")
+                # Update request status to completed (but with no results)
+                update_request_status(request_id, status='completed', result_count=0)
+                return
+            
+            # Hand the Excel file and completion email to the output pool so this
+            # worker can start the next job's IMAP fetch
+            report_output_executor.submit(
+                write_report_output, gmail_userid, gmail_password, pairs,
+                session_id, request_id, smtp_server
+            )
+            handed_off = True
+            
+        except Exception as e:
+            logger.exception(f"Error in background processing: {e}")
             # Update request status to failed
-            if request_id and request_id in request_status:
-                request_status[request_id]['status'] = 'failed'
-                request_status[request_id]['error'] = str(error)
-                request_status[request_id]['updated_at'] = datetime.now().isoformat()
-            return
+            update_request_status(request_id, status='failed', error=str(e))
         
-        if not pairs:
-            logger.warning("상담 기록을 찾을 수 없습니다")
-            # Update request status to completed (but with no results)
-            if request_id and request_id in request_status:
-                request_status[request_id]['status'] = 'completed'
-                request_status[request_id]['result_count'] = 0
-                request_status[request_id]['updated_at'] = datetime.now().isoformat()
-            return
+        finally:
+            # Unless the output stage took over, the job ends here
+            if not handed_off:
+                finish_report_job(smtp_server, gmail_userid, gmail_password, session_id, request_id)
+
+
+def write_report_output(gmail_userid: str, gmail_password: str, pairs: List[EmailPair],
+                        session_id: str = None, request_id: str = None,
+                        smtp_server: smtplib.SMTP_SSL = None):
+    """
+    Output stage of a report job: save the Excel file and send the completion email.
+    
+    Runs on report_output_executor after process_emails_background has found the pairs.
+    
+    Args:
+        gmail_userid: Gmail account
+        gmail_password: Gmail app password
+        pairs: Email pairs found by the job
+        session_id: Optional session ID for logging
+        request_id: Optional request ID for tracking
+        smtp_server: SMTP connection opened by the job, if any
+    """
+    with session_logging(session_id):
+        try:
+            # Create Excel file
+            output_file = f"consultation_report_{report_timestamp(datetime.now())}.xlsx"
+            result_file_path = os.path.join(RESULTS_DIR, f"{request_id}_{output_file}" if request_id else output_file)
+            logger.info(f"엑셀 보고서를 생성하고 있습니다: {result_file_path}")
+            
+            # Prepare data for Excel
+            logger.info("데이터를 정리하고 있습니다...")
+            if session_id:
+                # Keep the rows so /download can serve this session without a client upload
+                rows = [pair_to_row(pair) for pair in pairs]
+                report_cache[session_id] = rows
+            else:
+                # Nothing else needs the rows, so build each one as the sheet consumes it
+                rows = map(pair_to_row, pairs)
+            
+            # Save to Excel
+            logger.info("엑셀 파일을 저장하고 있습니다...")
+            excel_data = save_excel(result_file_path, REPORT_COLUMNS, rows, REPORT_SHEET_NAME)
+            logger.info(f"엑셀 보고서가 생성되었습니다: {result_file_path}")
+            
+            # Send completion notification email with attachment
+            logger.info("완료 알림 이메일을 전송하고 있습니다...")
+            result_count = len(pairs)
+            body = render_completion_email(pairs, request_id)
+            # Nothing reads the pairs past this point; the job holds the only references to
+            # their email messages, so drop them before the slow send instead of after it
+            pairs.clear()
+            # Attach the workbook from memory rather than reading the file back
+            send_completion_notification(gmail_userid, gmail_password, body, result_file_path,
+                                         server=smtp_server, excel_data=excel_data)
+            logger.info("완료 알림 이메일이 전송되었습니다")
+            
+            # Update request status to completed with result file path
+            update_request_status(request_id, status='completed', result_count=result_count, result_file=result_file_path)
+            
+            logger.info(f"모든 처리가 완료되었습니다. 총 {result_count}건의 상담 기록을 처리했습니다")
+            
+            # Note: Don't clean up the Excel file anymore since we want to keep it for download
+            
+        except Exception as e:
+            logger.exception(f"Error writing report output: {e}")
+            update_request_status(request_id, status='failed', error=str(e))
         
-        # Create Excel file
-        output_file = f"consultation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        result_file_path = os.path.join(RESULTS_DIR, f"{request_id}_{output_file}" if request_id else output_file)
-        logger.info(f"엑셀 보고서를 생성하고 있습니다: {result_file_path}")
-        
-        # Prepare data for Excel
-        logger.info("데이터를 정리하고 있습니다...")
-        data = []
-        for pair in pairs:
-            data.append({
-                '상담일': pair.get_date(),
-                '시작시간': pair.get_start_time(),
-                '종료시간': pair.get_end_time(),
-                '장소': '연구실',
-                '학생': pair.get_student_name(),
-                '학번': pair.get_student_id(),
-                '발신자 이메일 주소': pair.get_request_from(),
-                '수신자 이메일 주소': pair.get_request_to(),
-                '메일의 제목': pair.get_request_subject(),
-                '상담요청 내용': pair.get_request_text(),
-                '교수 답변': pair.get_response_text()
-            })
-        
-        # Create DataFrame and save to Excel
-        logger.info("엑셀 파일을 저장하고 있습니다...")
-        df = pd.DataFrame(data)
-        df.to_excel(result_file_path, index=False, engine='openpyxl')
-        logger.info(f"엑셀 보고서가 생성되었습니다: {result_file_path}")
-        
-        # Send completion notification email with attachment
-        logger.info("완료 알림 이메일을 전송하고 있습니다...")
-        send_completion_notification(gmail_userid, gmail_password, pairs, result_file_path, request_id)
-        logger.info("완료 알림 이메일이 전송되었습니다")
-        
-        # Update request status to completed with result file path
+        finally:
+            finish_report_job(smtp_server, gmail_userid, gmail_password, session_id, request_id)
+
+
+def finish_report_job(smtp_server: smtplib.SMTP_SSL, gmail_userid: str, gmail_password: str,
+                      session_id: str, request_id: str):
+    """Return the job's SMTP session for reuse and end its log stream with the final status."""
+    # Keep the shared SMTP session for the account's next job
+    if smtp_server is not None:
+        release_smtp(smtp_server, gmail_userid, gmail_password)
+    
+    # Send the final status and end signal to stream
+    if session_id:
+        done = None
         if request_id and request_id in request_status:
-            request_status[request_id]['status'] = 'completed'
-            request_status[request_id]['result_count'] = len(pairs)
-            request_status[request_id]['result_file'] = result_file_path
-            request_status[request_id]['updated_at'] = datetime.now().isoformat()
-        
-        logger.info(f"모든 처리가 완료되었습니다. 총 {len(pairs)}건의 상담 기록을 처리했습니다")
+            # Snapshot, so the stream reports the status as of the job's end
+            done = replace(request_status[request_id])
+        end_log_stream(session_id, done)
+
+
+def save_excel(path: str, columns, rows, sheet_name: str):
+    """
+    Write rows to an xlsx file with an openpyxl write-only workbook.
+    
+    Write-only mode serializes each row as it is appended instead of keeping a
+    Cell object per value in memory. The workbook is built in memory and moved
+    into place with os.replace, so a crash never leaves a truncated file at path.
+    
+    Args:
+        path: Output file path
+        columns: Header row
+        rows: Iterable of row sequences, in column order
+        sheet_name: Name of the worksheet
         
-        # Note: Don't clean up the Excel file anymore since we want to keep it for download
+    Returns:
+        The saved workbook bytes (a view of the in-memory buffer)
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(columns)
+    for row in rows:
+        worksheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    
+    data = buffer.getbuffer()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return data
+
+
+def stream_excel(columns, rows, sheet_name: str):
+    """
+    Write rows to xlsx in a worker thread and yield the bytes as they are produced.
+    
+    The worker writes into a bounded queue, so generation overlaps with sending the
+    previous chunk to the client instead of finishing the whole file first.
+    
+    Args:
+        columns: Header row
+        rows: Iterable of row sequences, in column order
+        sheet_name: Name of the worksheet
         
-    except Exception as e:
-        logger.exception(f"Error in background processing: {e}")
-        # Update request status to failed
-        if request_id and request_id in request_status:
-            request_status[request_id]['status'] = 'failed'
-            request_status[request_id]['error'] = str(e)
-            request_status[request_id]['updated_at'] = datetime.now().isoformat()
+    Yields:
+        Chunks of the xlsx file
+    """
+    chunk_queue = queue.Queue(maxsize=EXCEL_STREAM_BUFFERS)
+    cancelled = threading.Event()
     
-    finally:
-        # Remove queue handler
-        if queue_handler:
-            root_logger = logging.getLogger()
-            main_logger = logging.getLogger('main')
-            app_logger = logging.getLogger(__name__)
-            
+    def build():
+        pipe = ExcelChunkPipe(chunk_queue, cancelled)
+        try:
+            workbook = xlsxwriter.Workbook(pipe, EXCEL_WORKBOOK_OPTIONS)
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, columns)
+            for row_idx, row in enumerate(rows, 1):
+                worksheet.write_row(row_idx, 0, row)
+            workbook.close()
+            pipe.close()
+            result = None
+        except Exception as e:
+            if not cancelled.is_set():
+                logger.exception(f"Error generating Excel file: {e}")
+            result = e
+        # Signal completion (None) or failure (the exception) to the consumer
+        while not cancelled.is_set():
             try:
-                root_logger.removeHandler(queue_handler)
-                main_logger.removeHandler(queue_handler)
-                app_logger.removeHandler(queue_handler)
-            except:
-                pass
-        
-        # Send end signal to stream
-        if session_id and session_id in log_queues:
-            log_queues[session_id].put(None)
+                chunk_queue.put(result, timeout=1)
+                break
+            except queue.Full:
+                continue
+    
+    threading.Thread(target=build, daemon=True).start()
+    
+    try:
+        while True:
+            chunk = chunk_queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                # Abort the response rather than sending a truncated file
+                raise chunk
+            yield chunk
+    finally:
+        cancelled.set()
+
+
+def is_valid_upload(payload: dict) -> bool:
+    """
+    Check that the table uploaded to /download can be written to a sheet.
+    
+    'rows' must be a list of cell lists (with an optional 'columns' list) and
+    'data' a list of records; every cell must be a JSON scalar.
+    """
+    if payload.get('rows'):
+        columns = payload.get('columns')
+        if columns is not None and not (isinstance(columns, list)
+                                        and all(isinstance(name, UPLOAD_CELL_TYPES) for name in columns)):
+            return False
+        rows = payload['rows']
+        return isinstance(rows, list) and all(
+            isinstance(row, list) and all(isinstance(cell, UPLOAD_CELL_TYPES) for cell in row) for row in rows)
+    
+    records = payload.get('data')
+    return isinstance(records, list) and all(
+        isinstance(record, dict) and all(isinstance(cell, UPLOAD_CELL_TYPES) for cell in record.values())
+        for record in records)
 
 
 @app.route('/')
 def index():
     """Render the main page."""
-    return render_template('index.html')
+    return render_page('index.html')
 
 
 @app.route('/stream/<session_id>')
@@ -466,26 +1302,43 @@ def stream(session_id):
     
     def generate():        
         # Send initial connection message
-        yield f"data: [연결됨] 로그 스트림이 시작되었습니다 (세션: {session_id}, {list(log_queues.keys())})\n\n"
+        yield f"data: [연결됨] 로그 스트림이 시작되었습니다 (세션: {session_id}, {list(log_queues.keys())})\n\n".encode('utf-8')
         
-        try:
-            while True:
-                # Wait for log messages
-                try:
-                    log_queue = log_queues[session_id]
-                    if not log_queue:
-                        yield f"data: [오류] 로그 큐를 찾을 수 없습니다. log_queues keys: {list(log_queues.keys())}, session_id: {session_id}\n\n"
-                        break
-                    msg = log_queue.get(timeout=10)
+        # The client may connect before /process has created the stream
+        log_stream = get_log_stream(session_id)
+        
+        while True:
+            while log_stream.messages:
+                # Coalesce everything already buffered into one event
+                batch = []
+                ended = False
+                while log_stream.messages and len(batch) < SSE_MAX_BATCH:
+                    msg = log_stream.messages.popleft()
                     if msg is None:  # Sentinel to end the stream
-                        yield f"data: [종료] 로그 스트림이 종료되었습니다\n\n"
+                        ended = True
                         break
-                    yield f"data: {msg}\n\n"
-                except queue.Empty:
-                    # Send a heartbeat to keep connection alive
-                    yield ": heartbeat\n\n"
-        finally:
-          pass
+                    if isinstance(msg, RequestRecord):  # Final status of the job
+                        if batch:
+                            yield format_sse_event(batch)
+                            batch = []
+                        yield b"event: done\ndata: " + orjson.dumps(msg) + b"\n\n"
+                        continue
+                    batch.append(msg)
+                if batch:
+                    yield format_sse_event(batch)
+                if ended:
+                    yield SSE_END_FRAME
+                    # The job is done with this stream; release it
+                    log_queues.pop(session_id)
+                    return
+            
+            # Keep the stream from expiring while a client is attached
+            log_queues.touch(session_id)
+            
+            # Wait for log messages
+            if not log_stream.wait(SSE_HEARTBEAT_INTERVAL):
+                # Send a heartbeat to keep connection alive
+                yield SSE_HEARTBEAT_FRAME
 
     return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
@@ -494,35 +1347,30 @@ def stream(session_id):
 def process():
     """Process the email consultation request in background."""
     try:
-        # Get form data
-        gmail_userid = request.form.get('gmail_userid', '').strip()
-        gmail_password = request.form.get('gmail_password', '').strip()
-        start_date_str = request.form.get('start_date', '').strip()
-        end_date_str = request.form.get('end_date', '').strip()
-        session_id = request.form.get('session_id', '')
+        # Get form data and validate required fields
+        form = request.form
+        values = {field: form.get(field, '').strip() for field, _ in REQUIRED_FIELDS}
+        for field, error_message in REQUIRED_FIELDS:
+            if not values[field]:
+                return json_response({'error': error_message}), 400
+        gmail_userid = values['gmail_userid']
+        gmail_password = values['gmail_password']
+        start_date_str = values['start_date']
+        end_date_str = values['end_date']
+        session_id = form.get('session_id', '')
         
         # Optional parameters
-        student_id_length_str = request.form.get('student_id_length', '8').strip()
-        keywords_str = request.form.get('keywords', '').strip()
-        strict_mode_str = request.form.get('strict_mode', 'true').strip().lower()
-        
-        # Validate required fields
-        if not gmail_userid:
-            return jsonify({'error': '이메일 주소를 입력해주세요'}), 400
-        if not gmail_password:
-            return jsonify({'error': '비밀번호를 입력해주세요'}), 400
-        if not start_date_str:
-            return jsonify({'error': '시작일을 선택해주세요'}), 400
-        if not end_date_str:
-            return jsonify({'error': '종료일을 선택해주세요'}), 400
+        student_id_length_str = form.get('student_id_length', '8').strip()
+        keywords_str = form.get('keywords', '').strip()
+        strict_mode_str = form.get('strict_mode', 'true').strip().lower()
         
         # Parse dates
         try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+            start_date = datetime.fromisoformat(start_date_str)
+            end_date = datetime.fromisoformat(end_date_str)
         except ValueError as e:
             logger.error(f"Date parsing error: {e}")
-            return jsonify({'error': '날짜 형식이 올바르지 않습니다'}), 400
+            return json_response({'error': '날짜 형식이 올바르지 않습니다'}), 400
         
         # Parse student ID length
         try:
@@ -538,231 +1386,236 @@ def process():
             keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
 
         # Set up logging to queue if session_id is provided
-        queue_handler = None
-        if session_id:
-            # Ensure queue exists for this session
-            if session_id not in log_queues:
-                log_queue = queue.Queue()
-                log_queues[session_id] = log_queue
-            else:
-                log_queue = log_queues[session_id]
-            
-            queue_handler = QueueHandler(log_queue)
-            queue_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-            
-            # Add handler to root logger and main module logger
-            root_logger = logging.getLogger()
-            main_logger = logging.getLogger('main')
-            root_logger.addHandler(queue_handler)
-            main_logger.addHandler(queue_handler)
-
         # Parse strict mode (default: True)
         strict_mode = strict_mode_str in ('true', '1', 'on', 'yes')
 
-        # Quick Gmail authentication check only (for fast validation)
-        logger.info("Gmail 인증을 확인하고 있습니다...")
-        
-        try:
-            from main import GmailIMAPClient
-            client = GmailIMAPClient(gmail_userid, gmail_password)
-            connect_result = client.connect()
+        # Quick Gmail authentication check only (for fast validation), logged to the session stream
+        with session_logging(session_id):
+            logger.info("Gmail 인증을 확인하고 있습니다...")
             
-            if connect_result is not True:
-                # Authentication failed
-                if connect_result == "AUTH_FAILED":
-                    return jsonify({
-                        'error': connect_result,
-                        'errorType': 'AUTH_FAILED',
-                        'message': 'Gmail 인증에 실패했습니다. 앱 비밀번호를 확인해주세요.'
-                    }), 401
-                elif connect_result == "CONNECTION_FAILED":
-                    return jsonify({
-                        'error': connect_result,
-                        'errorType': 'AUTH_FAILED',
-                        'message': 'Gmail 연결에 실패했습니다. 인증 정보를 확인해주세요.'
-                    }), 401
-                return jsonify({'error': '연결에 실패했습니다'}), 400
+            try:
+                from main import GmailIMAPClient
+                client = GmailIMAPClient(gmail_userid, gmail_password, pool_size=JOB_IMAP_POOL_SIZE)
+                connect_result = client.connect()
+                
+                if connect_result is not True:
+                    # Authentication failed
+                    if connect_result == "AUTH_FAILED":
+                        return json_response({
+                            'error': connect_result,
+                            'errorType': 'AUTH_FAILED',
+                            'message': 'Gmail 인증에 실패했습니다. 앱 비밀번호를 확인해주세요.'
+                        }), 401
+                    elif connect_result == "CONNECTION_FAILED":
+                        return json_response({
+                            'error': connect_result,
+                            'errorType': 'AUTH_FAILED',
+                            'message': 'Gmail 연결에 실패했습니다. 인증 정보를 확인해주세요.'
+                        }), 401
+                    return json_response({'error': '연결에 실패했습니다'}), 400
+                
+                logger.info("Gmail 인증이 성공했습니다")
+                
+            except Exception as e:
+                logger.exception(f"인증 확인 중 오류: {e}")
+                return json_response({'error': f'인증 확인 중 오류가 발생했습니다: {str(e)}'}), 500
             
-            # Close connection immediately after authentication
-            client.close()
-            logger.info("Gmail 인증이 성공했습니다")
             
-        except Exception as e:
-            logger.exception(f"인증 확인 중 오류: {e}")
-            return jsonify({'error': f'인증 확인 중 오류가 발생했습니다: {str(e)}'}), 500
-        
-        finally:
-            # Remove queue handler if it was added
-            if queue_handler:
-                root_logger = logging.getLogger()
-                main_logger = logging.getLogger('main')
-                try:
-                    root_logger.removeHandler(queue_handler)
-                    main_logger.removeHandler(queue_handler)
-                except:
-                    pass
-        
         # Generate request ID
         request_id = str(uuid.uuid4())
         
         # Store initial request status (email_count will be updated in background)
-        request_status[request_id] = {
-            'status': 'pending',
-            'session_id': session_id,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
-            'email_count': 0,  # Will be updated in background
-            'result_count': 0,
-            'error': None
-        }
+        now = datetime.now()
+        created_at = now.isoformat()
+        request_status[request_id] = RequestRecord(
+            request_id=request_id,
+            session_id=session_id,
+            created_at=created_at,
+            created_ts=now.timestamp(),
+            updated_at=created_at
+        )
+        
+        # Keep the authenticated connection open for the worker instead of logging in again
+        hand_off_imap_client(request_id, client)
         
         # Start background processing (email_count = 0 to trigger calculation in background)
-        thread = threading.Thread(
-            target=process_emails_background,
-            args=(gmail_userid, gmail_password, start_date, end_date, 
-                  start_date_str, end_date_str, keywords, student_id_length, 
-                  0, strict_mode, session_id, request_id),  # email_count = 0
-            daemon=True
+        report_executor.submit(
+            process_emails_background,
+            gmail_userid, gmail_password, start_date, end_date,
+            start_date_str, end_date_str, keywords, student_id_length,
+            0, strict_mode, session_id, request_id  # email_count = 0
         )
-        thread.start()
         logger.info("Background processing started")
         
         # Return immediate response with request ID
-        return jsonify({
+        return json_response({
             'success': True,
             'message': '처리가 시작되었습니다. 이메일 수 계산 중입니다.',
             'background': True,
             'request_id': request_id
-        })
+        }, 202)
         
     except Exception as e:
         logger.exception(f"Unexpected error in process: {e}")
         
         # Send end signal to stream
         session_id = request.form.get('session_id', '')
-        if session_id and session_id in log_queues:
-            log_queues[session_id].put(None)
+        if session_id:
+            end_log_stream(session_id)
         
-        return jsonify({'error': f'서버 오류가 발생했습니다: {str(e)}'}), 500
+        return json_response({'error': f'서버 오류가 발생했습니다: {str(e)}'}), 500
 
 
 @app.route('/download', methods=['POST'])
 def download():
     """Generate and download Excel file."""
     try:
-        # Get table data from request
-        data = request.json.get('data', [])
+        # Reject oversized uploads before spending CPU on parsing them
+        if (request.content_length or 0) > MAX_DOWNLOAD_PAYLOAD:
+            return json_response({'error': '업로드한 데이터가 너무 큽니다'}), 413
         
-        if not data:
-            return jsonify({'error': '다운로드할 데이터가 없습니다'}), 400
+        # The parsed body is only read here, so don't keep it cached on the request
+        payload = request.get_json(silent=True, cache=False) or {}
         
-        # Create DataFrame
-        df = pd.DataFrame(data)
+        # A completed background job already wrote the workbook; send that file as-is
+        if payload.get('request_id'):
+            return download_result_file(payload['request_id'])
         
-        # Create Excel file in memory
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='상담기록')
-        output.seek(0)
+        # Prefer the rows cached by the background job, fall back to uploaded table data
+        session_id = payload.get('session_id')
+        rows = report_cache.get(session_id) if session_id else None
+        
+        # Check client-uploaded tables before streaming starts, since a bad cell could
+        # then only abort the response; also bound the work done for them
+        uploaded = payload.get('rows') or payload.get('data')
+        if not rows and uploaded:
+            if not is_valid_upload(payload):
+                return json_response({'error': '다운로드할 데이터 형식이 올바르지 않습니다'}), 400
+            if len(uploaded) > MAX_DOWNLOAD_ROWS:
+                return json_response({'error': f'한 번에 최대 {MAX_DOWNLOAD_ROWS}행까지 다운로드할 수 있습니다'}), 413
+        
+        # Rows are written to the sheet as-is, no DataFrame needed
+        if rows:
+            columns = REPORT_COLUMNS
+        elif payload.get('rows'):
+            columns = payload.get('columns') or REPORT_COLUMNS
+            rows = payload['rows']
+        elif payload.get('data'):
+            # Records may not share the same keys; use every key in first-seen order
+            records = payload['data']
+            columns = list(dict.fromkeys(key for record in records for key in record))
+            rows = ([record.get(key) for key in columns] for record in records)
+        else:
+            return json_response({'error': '다운로드할 데이터가 없습니다'}), 400
         
         # Generate filename
-        filename = f"consultation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        filename = f"consultation_report_{report_timestamp(datetime.now())}.xlsx"
         
         logger.info(f"Generating Excel file: {filename}")
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
+        # Build the workbook in a worker thread and stream chunks as they are produced
+        response = Response(
+            stream_with_context(stream_excel(columns, rows, REPORT_SHEET_NAME)),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
         
     except Exception as e:
         logger.exception(f"Error generating Excel file: {e}")
-        return jsonify({'error': f'엑셀 파일 생성 중 오류가 발생했습니다: {str(e)}'}), 500
+        return json_response({'error': f'엑셀 파일 생성 중 오류가 발생했습니다: {str(e)}'}), 500
 
 
 @app.route('/api/request/<request_id>', methods=['GET'])
 def get_request_status(request_id):
     """Get status of a specific request by ID."""
-    if request_id not in request_status:
-        return jsonify({'error': '요청 ID를 찾을 수 없습니다'}), 404
+    request_info = request_status.get(request_id)
+    if request_info is None:
+        return json_response({'error': '요청 ID를 찾을 수 없습니다'}), 404
     
-    return jsonify({
-        'request_id': request_id,
-        **request_status[request_id]
-    })
+    return json_response(request_info)
 
 
 @app.route('/api/request/<request_id>/download', methods=['GET'])
 def download_result_file(request_id):
     """Download the result Excel file for a completed request."""
     if request_id not in request_status:
-        return jsonify({'error': '요청 ID를 찾을 수 없습니다'}), 404
+        return json_response({'error': '요청 ID를 찾을 수 없습니다'}), 404
     
     request_info = request_status[request_id]
     
     # Check if request is completed
-    if request_info['status'] != 'completed':
-        return jsonify({'error': '아직 처리가 완료되지 않았습니다'}), 400
+    if request_info.status != 'completed':
+        return json_response({'error': '아직 처리가 완료되지 않았습니다'}), 400
     
     # Check if result file exists
-    if 'result_file' not in request_info or not request_info['result_file']:
-        return jsonify({'error': '결과 파일이 없습니다'}), 404
-    
-    result_file_path = request_info['result_file']
+    if not request_info.result_file:
+        return json_response({'error': '결과 파일이 없습니다'}), 404
     
-    # Check if file exists on disk
-    if not os.path.exists(result_file_path):
-        return jsonify({'error': '결과 파일을 찾을 수 없습니다'}), 404
+    result_file_path = request_info.result_file
     
     try:
         # Generate a user-friendly filename
-        filename = f"consultation_report_{request_id[:8]}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        filename = f"consultation_report_{request_id[:8]}_{report_timestamp(datetime.now(), with_time=False)}.xlsx"
         
         logger.info(f"Downloading result file for request {request_id}: {result_file_path}")
         
+        # conditional enables ETag/If-Modified-Since and Range handling for the file
         return send_file(
             result_file_path,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            conditional=True
         )
     
+    except FileNotFoundError:
+        return json_response({'error': '결과 파일을 찾을 수 없습니다'}), 404
+    
     except Exception as e:
         logger.exception(f"Error downloading file for request {request_id}: {e}")
-        return jsonify({'error': f'파일 다운로드 중 오류가 발생했습니다: {str(e)}'}), 500
+        return json_response({'error': f'파일 다운로드 중 오류가 발생했습니다: {str(e)}'}), 500
 
 
 @app.route('/api/requests', methods=['GET'])
 def list_requests():
-    """List all tracked requests."""
-    requests_list = [
-        {'request_id': req_id, **req_data}
-        for req_id, req_data in request_status.items()
-    ]
-    # Sort by created_at descending (newest first)
-    requests_list.sort(key=lambda x: x['created_at'], reverse=True)
-    return jsonify({'requests': requests_list})
+    """
+    List tracked requests, newest first.
+    
+    Query parameters:
+        limit: Maximum number of requests to return (default 100)
+        offset: Number of requests to skip (default 0)
+    """
+    limit = max(request.args.get('limit', DEFAULT_REQUEST_LIST_LIMIT, type=int), 0)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    # Records already carry their request_id, so they are serialized without copying;
+    # only the requested page (and what precedes it) is ordered, not every tracked request
+    records = request_status.values()
+    newest = heapq.nlargest(offset + limit, records, key=lambda x: x.created_ts)
+    return json_response({
+        'requests': newest[offset:],
+        'total': len(records)
+    })
 
 
 @app.route('/status')
 def status_page():
     """Render the status monitoring page."""
-    return render_template('status.html')
+    return render_page('status.html')
 
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
-    return render_template('404.html'), 404
+    return render_page('404.html', 404)
 
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors."""
     logger.exception(f"Internal server error: {error}")
-    return render_template('500.html'), 500
+    return render_page('500.html', 500)
 
 
 if __name__ == '__main__':
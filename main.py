@@ -8,17 +8,28 @@ and generates an Excel report.
 
 import imaplib
 import email
-from email.parser import BytesParser
-from email.policy import default
-from email.utils import parsedate_to_datetime
+from email.header import decode_header, make_header
+from email.iterators import typed_subpart_iterator
+from email.parser import BytesParser, BytesHeaderParser
+from email.policy import default, compat32
+from email.utils import getaddresses, parsedate_to_datetime
 import os
 import sys
 import re
 import logging
 import argparse
+import bisect
+import contextvars
+import functools
+import queue
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Tuple, Optional
-import pandas as pd
+from collections import defaultdict
+from typing import List, Dict, Tuple, Optional, Iterator
+import xlsxwriter
 
 # Configure logging
 logging.basicConfig(
@@ -27,53 +38,170 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Column headers of the consultation report, in sheet order
+REPORT_COLUMNS = (
+    '상담일', '시작시간', '종료시간', '장소', '학생', '학번',
+    '발신자 이메일 주소', '수신자 이메일 주소', '메일의 제목',
+    '상담요청 내용', '교수 답변'
+)
+# xlsxwriter options for report workbooks: rows are written strictly in order, so
+# constant_memory can flush each one, and cell text is written as-is instead of being
+# turned into links, formulas or numbers (which would also cap URLs at 2079 characters)
+EXCEL_WORKBOOK_OPTIONS = {
+    'constant_memory': True,
+    'strings_to_urls': False,
+    'strings_to_formulas': False,
+    'strings_to_numbers': False,
+}
+
+# Number of messages requested per IMAP FETCH command
+FETCH_BATCH_SIZE = 100
+# Message UID in a UID FETCH response, e.g. b'12 (UID 1012 RFC822 {3456}'
+FETCH_RESPONSE_UID = re.compile(rb'UID (\d+)')
+# Parser for header-only fetches: compat32 returns raw header strings instead of
+# building header objects, which is much cheaper when only a few fields are read
+HEADER_PARSER = BytesHeaderParser(policy=compat32)
+# Line break of a folded header line; compat32 keeps it in the value, policy=default drops it
+HEADER_FOLDING = re.compile(r'\r?\n(?=[ \t])')
+# 8-digit student ID, e.g. "학번 12345678", "12345678 학번", "저는 12345678입니다"
+STUDENT_ID_PATTERN = re.compile(r'\d{8}')
+# Student name patterns, tried in order (Korean names are typically 2-4 characters):
+# "저는 <name>입니다", "<student_id> 학번 <name>입니다", "학번 <student_id> <name>입니다"
+STUDENT_NAME_PATTERNS = (
+    re.compile(r'저는\s*([가-힣]{2,4})(?:입니다|이라고|라고|입니|이에요)'),
+    re.compile(r'\d{8}\s+학번\s+([가-힣]{2,4})(?:입니다|이라고|라고|입니|이에요)'),
+    re.compile(r'학번\s+\d{8}\s+([가-힣]{2,4})(?:입니다|이라고|라고|입니|이에요)'),
+)
+# Words the name patterns can capture that are not names: after "저는", and after a student ID
+NON_NAME_WORDS = frozenset({'학번', '이름', '학생', '교수님'})
+NON_NAME_WORDS_AFTER_ID = frozenset({'학번', '이름', '학생', '문의사항', '과제', '질문'})
+# Header fields fetched to select messages before downloading them; the full header
+# block (Received, DKIM-Signature, ARC-*, ...) is several times larger
+HEADER_FETCH_PARTS = '(BODY.PEEK[HEADER.FIELDS (DATE FROM TO SUBJECT MESSAGE-ID IN-REPLY-TO REFERENCES)])'
+# Default maximum IMAP connections a client fetches batches with in parallel
+IMAP_POOL_SIZE = 8
+# Maximum IMAP connections open at once per account across all clients in the process
+# (Gmail refuses logins past 15; the rest is left for the user's own mail apps)
+IMAP_MAX_ACCOUNT_CONNECTIONS = 10
+# Bytes of compressed data read from the socket at a time on COMPRESS=DEFLATE connections
+INFLATE_READ_SIZE = 65536
+# Maximum FETCH commands sent on one connection before reading their responses
+IMAP_PIPELINE_DEPTH = 4
+# Domains whose mailboxes ignore dots and "+tag" suffixes in the local part of an address
+GMAIL_DOMAINS = frozenset({'gmail.com', 'googlemail.com'})
+# Default path of the local message cache enabled with --cache
+DEFAULT_CACHE_PATH = '.imap_cache.db'
+# Maximum UIDs per cache lookup query (SQLite limits the number of bound parameters)
+CACHE_QUERY_SIZE = 500
+
+
+# Number of IMAP connections each account has open, shared by all GmailIMAPClient instances
+account_connections = {}
+account_connections_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_email_date(value: str) -> Optional[datetime]:
+    """
+    Parse an email Date header value, taking naive dates as UTC.
+    
+    Results are cached by header value: the same Date is parsed again by the date
+    range check, subject matching and the report, and parsedate_to_datetime is
+    pure Python.
+    
+    Args:
+        value: Date header value (pass str(header) for policy=default header objects)
+    
+    Returns:
+        Timezone-aware datetime, or None if the value is not a valid date
+    """
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of an email address, for comparing addresses exactly.
+    
+    Addresses are lowercased, and Gmail addresses drop the dots and "+tag" suffix
+    of the local part, which Gmail ignores when delivering.
+    
+    Args:
+        address: Bare email address, e.g. from email.utils.getaddresses
+    
+    Returns:
+        Normalized address
+    """
+    address = address.strip().lower()
+    local, _, domain = address.rpartition('@')
+    if local and domain in GMAIL_DOMAINS:
+        return local.split('+', 1)[0].replace('.', '') + '@gmail.com'
+    return address
+
 
 class EmailPair:
-    """Represents a pair of original request email and its response."""
+    """
+    Represents a pair of original request email and its response.
+    
+    The response date and both body texts are extracted on first use and kept,
+    since the filters and the report each ask for them again.
+    """
+    
+    __slots__ = ('request', 'response', '_response_date', '_request_text', '_response_text')
     
     def __init__(self, request_email: email.message.EmailMessage, 
                  response_email: email.message.EmailMessage):
         self.request = request_email
         self.response = response_email
+        self._response_date = None
+        self._request_text = None
+        self._response_text = None
+    
+    def _get_response_date(self) -> datetime:
+        """Parse the response email Date header once (naive dates are taken as UTC)."""
+        if self._response_date is None:
+            date = parse_email_date(str(self.response['Date']))
+            if date is None:
+                raise ValueError(f"Invalid Date header: {self.response['Date']}")
+            self._response_date = date
+        return self._response_date
     
     def get_date(self) -> str:
         """Get response email date in YYYY-MM-DD format."""
-        date = parsedate_to_datetime(self.response['Date'])
-        if date.tzinfo is None:
-            date = date.replace(tzinfo=timezone.utc)
-        return date.strftime('%Y-%m-%d')
+        return self._get_response_date().strftime('%Y-%m-%d')
     
     def get_start_time(self) -> str:
         """Get response email time in HH:MM format."""
-        date = parsedate_to_datetime(self.response['Date'])
-        if date.tzinfo is None:
-            date = date.replace(tzinfo=timezone.utc)
-        return date.strftime('%H:%M')
+        return self._get_response_date().strftime('%H:%M')
     
     def get_end_time(self) -> str:
         """Get response email time + 30 minutes in HH:MM format."""
-        date = parsedate_to_datetime(self.response['Date'])
-        if date.tzinfo is None:
-            date = date.replace(tzinfo=timezone.utc)
-        end_time = date + timedelta(minutes=30)
+        end_time = self._get_response_date() + timedelta(minutes=30)
         return end_time.strftime('%H:%M')
     
     def get_request_text(self) -> str:
         """Extract plain text from request email body."""
-        return self._get_email_body(self.request)
+        if self._request_text is None:
+            self._request_text = self._get_email_body(self.request)
+        return self._request_text
     
     def get_response_text(self) -> str:
         """Extract plain text from response email body."""
-        return self._get_email_body(self.response)
+        if self._response_text is None:
+            self._response_text = self._get_email_body(self.response)
+        return self._response_text
     
     def get_student_id(self) -> str:
         """Extract student ID from request email body."""
         request_text = self.get_request_text()
         
         # Look for 8-digit student ID pattern
-        # Common patterns: "학번 12345678", "12345678 학번", "저는 12345678입니다"
-        pattern = re.compile(r'\d{8}')
-        match = pattern.search(request_text)
+        match = STUDENT_ID_PATTERN.search(request_text)
         
         if match:
             return match.group()
@@ -89,31 +217,28 @@ class EmailPair:
         
         # Pattern 1: "저는 <name>입니다" or "저는 <name>이라고 합니다"
         # But NOT "저는 학번 ..." which is not a name
-        pattern1 = re.compile(r'저는\s*([가-힣]{2,4})(?:입니다|이라고|라고|입니|이에요)')
-        match = pattern1.search(request_text)
+        match = STUDENT_NAME_PATTERNS[0].search(request_text)
         if match:
             name = match.group(1)
             # Filter out common words that are not names
-            if name not in ['학번', '이름', '학생', '교수님']:
+            if name not in NON_NAME_WORDS:
                 return name
         
         # Pattern 2: "학번 <student_id> <name>" followed by common verb endings
         # This pattern looks for names that come after student ID
         # E.g., "학번 12345678 김철수입니다"
-        pattern2 = re.compile(r'\d{8}\s+학번\s+([가-힣]{2,4})(?:입니다|이라고|라고|입니|이에요)')
-        match = pattern2.search(request_text)
+        match = STUDENT_NAME_PATTERNS[1].search(request_text)
         if match:
             name = match.group(1)
-            if name and name not in ['학번', '이름', '학생', '문의사항', '과제', '질문']:
+            if name and name not in NON_NAME_WORDS_AFTER_ID:
                 return name
         
         # Pattern 3: "<student_id> 학번 <name>"
         # E.g., "20251234 학번 박지훈입니다"
-        pattern3 = re.compile(r'학번\s+\d{8}\s+([가-힣]{2,4})(?:입니다|이라고|라고|입니|이에요)')
-        match = pattern3.search(request_text)
+        match = STUDENT_NAME_PATTERNS[2].search(request_text)
         if match:
             name = match.group(1)
-            if name and name not in ['학번', '이름', '학생', '문의사항', '과제', '질문']:
+            if name and name not in NON_NAME_WORDS_AFTER_ID:
                 return name
         
         return ""
@@ -131,46 +256,228 @@ class EmailPair:
     
     def _get_email_body(self, msg: email.message.EmailMessage) -> str:
         """Extract plain text body from email message."""
-        body = ""
+        # Text parts are collected and joined once instead of concatenated one by one
+        parts = []
         
         if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition", ""))
-                
+            # Only text/plain parts are read, so skip everything else without inspecting headers
+            for part in typed_subpart_iterator(msg, 'text', 'plain'):
                 # Skip attachments
-                if "attachment" in content_disposition:
+                if part.get_content_disposition() == 'attachment':
                     continue
                 
-                # Get text/plain parts
-                if content_type == "text/plain":
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            charset = part.get_content_charset() or 'utf-8'
-                            body += payload.decode(charset, errors='ignore')
-                    except Exception as e:
-                        logger.warning(f"Error decoding email part: {e}")
+                try:
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        charset = part.get_content_charset() or 'utf-8'
+                        parts.append(payload.decode(charset, errors='ignore'))
+                except Exception as e:
+                    logger.warning(f"Error decoding email part: {e}")
         else:
             # Simple non-multipart email
             try:
                 payload = msg.get_payload(decode=True)
                 if payload:
                     charset = msg.get_content_charset() or 'utf-8'
-                    body = payload.decode(charset, errors='ignore')
+                    parts.append(payload.decode(charset, errors='ignore'))
             except Exception as e:
                 logger.warning(f"Error decoding email: {e}")
         
-        return body.strip()
+        return ''.join(parts).strip()
+
+
+# Let imaplib send COMPRESS (RFC 4978), which it has no command entry for
+imaplib.Commands.setdefault('COMPRESS', ('AUTH', 'SELECTED'))
+
+
+class GmailIMAP4_SSL(imaplib.IMAP4_SSL):
+    """
+    IMAP4_SSL connection with COMPRESS=DEFLATE (RFC 4978) and pipelined UID FETCH.
+    
+    imaplib does all its I/O through read, readline and send, so once compression
+    is on, those deflate what is sent and inflate what is received.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self._compressor = None
+        self._decompressor = None
+        self._inflated = bytearray()
+        super().__init__(*args, **kwargs)
+    
+    def enable_compression(self) -> bool:
+        """
+        Turn on COMPRESS=DEFLATE if the server advertises it; call after login.
+        
+        Returns:
+            True if the connection is now compressed
+        """
+        # Servers may only advertise COMPRESS once authenticated, in the LOGIN response
+        capabilities = set(self.capabilities)
+        _, login_capabilities = self.response('CAPABILITY')
+        for line in login_capabilities:
+            if line:
+                capabilities.update(str(line, 'ascii').upper().split())
+        if 'COMPRESS=DEFLATE' not in capabilities:
+            return False
+        
+        status, _ = self._simple_command('COMPRESS', 'DEFLATE')
+        if status != 'OK':
+            return False
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        self._decompressor = zlib.decompressobj(-15)
+        return True
+    
+    def uid_fetch_pipelined(self, msg_sets: List[bytes], message_parts: str) -> Tuple[list, list]:
+        """
+        Send several UID FETCH commands before reading any of their responses (RFC 3501 5.5).
+        
+        Args:
+            msg_sets: UID sets, one command each, e.g. b'1,2,3'
+            message_parts: FETCH data items, e.g. '(RFC822)'
+        
+        Returns:
+            Tuple of (per command: its status, or the error it was rejected with,
+            FETCH data of all commands in the order the server sent it)
+        """
+        tags = [self._command('UID', 'FETCH', msg_set, message_parts) for msg_set in msg_sets]
+        
+        # Every tagged response is read even after a rejection, so the connection stays in sync
+        results = []
+        for tag in tags:
+            try:
+                status, _ = self._command_complete('UID', tag)
+                results.append(status)
+            except self.abort:
+                raise
+            except self.error as e:
+                results.append(e)
+        
+        _, msg_data = self._untagged_response('OK', [None], 'FETCH')
+        return results, [item for item in msg_data if item is not None]
+    
+    def _inflate(self):
+        """Read the next chunk of compressed data from the socket and inflate it."""
+        data = self.file.read1(INFLATE_READ_SIZE)
+        if not data:
+            raise self.abort('socket error: EOF')
+        self._inflated += self._decompressor.decompress(data)
+    
+    def read(self, size):
+        """Read 'size' bytes from remote."""
+        if self._decompressor is None:
+            return super().read(size)
+        while len(self._inflated) < size:
+            self._inflate()
+        data = bytes(self._inflated[:size])
+        del self._inflated[:size]
+        return data
+    
+    def readline(self):
+        """Read line from remote."""
+        if self._decompressor is None:
+            return super().readline()
+        end = self._inflated.find(b'\n')
+        while end < 0:
+            if len(self._inflated) > imaplib._MAXLINE:
+                raise self.error("got more than %d bytes" % imaplib._MAXLINE)
+            # Only search the newly inflated data for the line end
+            searched = len(self._inflated)
+            self._inflate()
+            end = self._inflated.find(b'\n', searched)
+        line = bytes(self._inflated[:end + 1])
+        del self._inflated[:end + 1]
+        return line
+    
+    def send(self, data):
+        """Send data to remote."""
+        if self._compressor is not None:
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        super().send(data)
+
+
+class MessageCache:
+    """
+    SQLite store of fetched message headers and bodies, keyed by mailbox and UID.
+    
+    IMAP UIDs stay valid for as long as the folder's UIDVALIDITY does not change,
+    so a message stored under (account, folder, UIDVALIDITY, UID) never needs to
+    be fetched again; repeated runs only download messages that are new.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'account TEXT, folder TEXT, uidvalidity INTEGER, uid INTEGER, header BLOB, message BLOB, '
+            'PRIMARY KEY (account, folder, uidvalidity, uid))'
+        )
+        self.db.commit()
+    
+    def get(self, mailbox: Tuple[str, str, int], column: str, uids: List[bytes]) -> Dict[bytes, bytes]:
+        """
+        Look up cached data for messages of a mailbox.
+        
+        Args:
+            mailbox: Tuple of (account, folder, UIDVALIDITY)
+            column: 'header' or 'message'
+            uids: Message UIDs to look up
+        
+        Returns:
+            Cached data by UID, for the UIDs that have it
+        """
+        found = {}
+        for start in range(0, len(uids), CACHE_QUERY_SIZE):
+            chunk = [int(uid) for uid in uids[start:start + CACHE_QUERY_SIZE]]
+            rows = self.db.execute(
+                f'SELECT uid, {column} FROM messages WHERE account = ? AND folder = ? AND uidvalidity = ? '
+                f'AND {column} IS NOT NULL AND uid IN ({",".join("?" * len(chunk))})',
+                (*mailbox, *chunk)
+            )
+            for uid, data in rows:
+                found[str(uid).encode()] = data
+        return found
+    
+    def put(self, mailbox: Tuple[str, str, int], column: str, items: List[Tuple[bytes, bytes]]):
+        """
+        Store fetched data for messages of a mailbox.
+        
+        Args:
+            mailbox: Tuple of (account, folder, UIDVALIDITY)
+            column: 'header' or 'message'
+            items: Tuples of (message UID, fetched data)
+        """
+        self.db.executemany(
+            f'INSERT INTO messages (account, folder, uidvalidity, uid, {column}) VALUES (?, ?, ?, ?, ?) '
+            f'ON CONFLICT (account, folder, uidvalidity, uid) DO UPDATE SET {column} = excluded.{column}',
+            [(*mailbox, int(uid), data) for uid, data in items]
+        )
+        self.db.commit()
+    
+    def close(self):
+        """Close the database."""
+        self.db.close()
 
 
 class GmailIMAPClient:
     """Client for fetching emails from Gmail using IMAP."""
     
-    def __init__(self, userid: str, password: str):
+    def __init__(self, userid: str, password: str, cache_path: Optional[str] = None,
+                 pool_size: int = IMAP_POOL_SIZE):
         self.userid = userid
         self.password = password
         self.connection = None
+        # Extra connections for parallel fetches, mapped to the folder each has selected
+        self.pool = {}
+        self.pool_size = pool_size
+        # Connections this client counts against the account's IMAP_MAX_ACCOUNT_CONNECTIONS
+        self.reserved_connections = 0
+        self.selected_folder = None
+        self.uidvalidity = None
+        # Emails within the date range found by the last fetch_pair_candidates, downloaded or not
+        self.messages_in_range = 0
+        # Local store of fetched messages, reused across runs (disabled without a cache path)
+        self.cache = MessageCache(cache_path) if cache_path else None
     
     def connect(self) -> bool:
         """Connect to Gmail IMAP server and authenticate.
@@ -180,14 +487,19 @@ class GmailIMAPClient:
         """
         try:
             logger.info("Connecting to Gmail IMAP server...")
-            self.connection = imaplib.IMAP4_SSL('imap.gmail.com', 993)
+            self.connection = GmailIMAP4_SSL('imap.gmail.com', 993)
             
             # Authenticate
             logger.info(f"Authenticating as {self.userid}...")
             self.connection.login(self.userid, self.password)
+            self._reserve_connections(1)
             
             logger.info("Successfully connected to Gmail IMAP")
             
+            # Message bodies compress well, so have the server deflate them if it can
+            if self._enable_compression(self.connection):
+                logger.info("IMAP compression (COMPRESS=DEFLATE) enabled")
+            
             # List available folders for debugging
             self._list_folders()
             
@@ -210,6 +522,79 @@ class GmailIMAPClient:
             logger.error(f"Connection failed: {e}")
             return "CONNECTION_FAILED"
     
+    def _enable_compression(self, connection: GmailIMAP4_SSL) -> bool:
+        """Enable COMPRESS=DEFLATE on a logged-in connection; a connection that refuses stays uncompressed."""
+        try:
+            return connection.enable_compression()
+        except imaplib.IMAP4.error:
+            return False
+    
+    def connect_pool(self, n: int) -> List[imaplib.IMAP4_SSL]:
+        """
+        Open additional authenticated connections for fetching in parallel.
+        
+        Only as many are opened as the account has left of IMAP_MAX_ACCOUNT_CONNECTIONS,
+        so parallel jobs of one account share the limit instead of failing to log in.
+        
+        Args:
+            n: Number of connections to open
+        
+        Returns:
+            The connections that logged in successfully (possibly fewer than n)
+        """
+        reserved = self._reserve_connections(n)
+        if reserved < n:
+            logger.info(f"Opening {reserved} of {n} pooled IMAP connections; "
+                        f"the account's other connections use the rest of its limit")
+        if not reserved:
+            return []
+        
+        def open_connection():
+            connection = GmailIMAP4_SSL('imap.gmail.com', 993)
+            connection.login(self.userid, self.password)
+            self._enable_compression(connection)
+            return connection
+        
+        with ThreadPoolExecutor(max_workers=reserved) as executor:
+            futures = [executor.submit(open_connection) for _ in range(reserved)]
+        
+        connections = []
+        for future in futures:
+            try:
+                connections.append(future.result())
+            except Exception as e:
+                logger.warning(f"Failed to open pooled IMAP connection: {e}")
+        self._release_connections(reserved - len(connections))
+        return connections
+    
+    def _reserve_connections(self, n: int) -> int:
+        """
+        Count up to n connections of this client against the account's IMAP_MAX_ACCOUNT_CONNECTIONS.
+        
+        Returns:
+            Number of connections reserved (0 if the account has none left)
+        """
+        account = self.userid.lower()
+        with account_connections_lock:
+            in_use = account_connections.get(account, 0)
+            reserved = max(min(n, IMAP_MAX_ACCOUNT_CONNECTIONS - in_use), 0)
+            account_connections[account] = in_use + reserved
+        self.reserved_connections += reserved
+        return reserved
+    
+    def _release_connections(self, n: int):
+        """Return n of this client's reserved connections to the account's limit."""
+        if not n:
+            return
+        account = self.userid.lower()
+        with account_connections_lock:
+            remaining = account_connections.get(account, 0) - n
+            if remaining > 0:
+                account_connections[account] = remaining
+            else:
+                account_connections.pop(account, None)
+        self.reserved_connections -= n
+    
     def _list_folders(self):
         """List all available IMAP folders for debugging."""
         try:
@@ -259,41 +644,8 @@ class GmailIMAPClient:
                 continue
                 
             try:
-                logger.info(f"\n{'='*50}")
-                logger.info(f"Searching {korean_name} ({folder_name})")
-                logger.info('='*50)
-                
-                # Select the folder
-                status, messages = self.connection.select(folder_name)
-                if status != 'OK':
-                    logger.error(f"Failed to select {folder_name}")
-                    continue
-                
-                num_messages = int(messages[0].decode())
-                logger.info(f"Total messages in {korean_name}: {num_messages}")
-                
-                # Format dates for IMAP search (DD-MMM-YYYY format)
-                since_date = start_date.strftime('%d-%b-%Y')
-                before_date = (end_date + timedelta(days=1)).strftime('%d-%b-%Y')
-                
-                logger.info(f"Searching for emails from {since_date} to {before_date}")
-                
-                # Search for emails in date range
-                search_criteria = f'(SINCE {since_date} BEFORE {before_date})'
-                logger.info(f"IMAP search criteria: {search_criteria}")
-                
-                status, message_numbers = self.connection.search(None, search_criteria)
-                
-                if status != 'OK':
-                    logger.error(f"Failed to search emails in {folder_name}")
-                    continue
-                
-                # Get list of message IDs
-                msg_ids = message_numbers[0].split()
-                num_found = len(msg_ids)
-                logger.info(f"Found {num_found} messages in {korean_name} within date range")
-                
-                if num_found == 0:
+                msg_ids = self._search_folder(folder_name, korean_name, start_date, end_date)
+                if not msg_ids:
                     continue
                 
                 # Fetch messages from this folder
@@ -309,6 +661,168 @@ class GmailIMAPClient:
         logger.info('='*50)
         return all_emails
     
+    def fetch_pair_candidates(self, start_date: datetime, end_date: datetime) -> List[email.message.EmailMessage]:
+        """
+        Fetch the emails within the date range that find_email_pairs can pair.
+        
+        Sent mail is downloaded in full. Received mail is selected from its headers
+        first, and only downloaded if find_email_pairs could use it: as the original
+        of one of the user's replies (referenced by Message-ID or answered by
+        subject), or as a reply to the user answering mail sent from another
+        address. find_email_pairs finds the same pairs as with fetch_emails.
+        
+        The number of messages within the range, downloaded or not, is kept in
+        messages_in_range.
+        
+        Args:
+            start_date: Start of the date range
+            end_date: End of the date range
+        
+        Returns:
+            Selected emails from the inbox followed by the sent mail
+        """
+        self.messages_in_range = 0
+        if not self.connection:
+            logger.error("Not connected to server")
+            return []
+        
+        # Ensure start_date and end_date have timezone info
+        if start_date.tzinfo is None:
+            start_date = start_date.replace(tzinfo=timezone.utc)
+        if end_date.tzinfo is None:
+            end_date = end_date.replace(tzinfo=timezone.utc)
+        
+        email_filter = EmailFilter(self.userid)
+        
+        def reference_ids(in_reply_to: str, references: str) -> set:
+            # Every Message-ID find_email_pairs could look a reply's original up by
+            ids = {email_filter._normalize_message_id(ref_id) for ref_id in references.split()}
+            ids.add(email_filter._normalize_message_id(in_reply_to))
+            ids.discard('')
+            return ids
+        
+        sent = []
+        sent_folder = self._find_sent_folder()
+        try:
+            sent_ids = self._search_folder(sent_folder, '보낸 메일함', start_date, end_date)
+            if sent_ids:
+                sent = self._fetch_messages_from_folder(sent_ids, start_date, end_date, '보낸 메일함')
+        except Exception as e:
+            logger.error(f"Error searching {sent_folder}: {e}")
+        self.messages_in_range = len(sent)
+        
+        # What the sent mail points back to: the user's replies pair with the received mail
+        # they reference or answer by subject (Strategy 1), and mail sent from another
+        # address pairs with the received replies to it (Strategy 2)
+        replied_ids = set()
+        replied_subjects = set()
+        other_sent_ids = set()
+        other_sent_subjects = set()
+        for msg in sent:
+            indexed = IndexedMessage(msg)
+            normalized_subject = email_filter._normalize_subject(indexed.subject)
+            if email_filter.user_address in indexed.from_addresses:
+                replied_ids |= reference_ids(indexed.in_reply_to, indexed.references)
+                if normalized_subject and email_filter._is_reply_subject(indexed.subject):
+                    replied_subjects.add(normalized_subject)
+            else:
+                other_sent_ids.add(email_filter._normalize_message_id(msg.get('Message-ID', '')))
+                if normalized_subject:
+                    other_sent_subjects.add(normalized_subject)
+        other_sent_ids.discard('')
+        
+        def is_pair_candidate(header_msg: email.message.Message) -> bool:
+            subject = self._decode_header(header_msg.get('Subject', ''))
+            normalized_subject = email_filter._normalize_subject(subject)
+            msg_id = email_filter._normalize_message_id(header_msg.get('Message-ID', ''))
+            if msg_id in replied_ids or normalized_subject in replied_subjects:
+                return True
+            
+            # A reply to the user, with the reply indicators find_email_pairs requires
+            to_addresses = {normalize_address(addr) for _, addr in getaddresses([header_msg.get('To', '')]) if addr}
+            if email_filter.user_address not in to_addresses:
+                return False
+            in_reply_to = header_msg.get('In-Reply-To', '')
+            references = header_msg.get('References', '')
+            if not (in_reply_to or references or email_filter._is_reply_subject(subject)):
+                return False
+            return bool(reference_ids(in_reply_to, references) & other_sent_ids) or (
+                email_filter._is_reply_subject(subject) and normalized_subject in other_sent_subjects)
+        
+        # Received mail: selected from headers before downloading
+        received = []
+        inbox_folder = self._find_inbox_folder()
+        try:
+            inbox_ids = self._search_folder(inbox_folder, '받은 메일함', start_date, end_date)
+            if inbox_ids:
+                num_messages = len(inbox_ids)
+                logger.info(f"PROGRESS|TOTAL|{num_messages}", extra={'progress': f"TOTAL|{num_messages}"})
+                headers = self._fetch_headers(inbox_ids, start_date, end_date, '받은 메일함')
+                self.messages_in_range += len(headers)
+                wanted_ids = [msg_id for msg_id, header_msg in headers if is_pair_candidate(header_msg)]
+                logger.info(f"{len(wanted_ids)} of {len(headers)} inbox messages in the date range can form a pair")
+                received = self._download_messages(wanted_ids, inbox_ids, '받은 메일함')
+        except Exception as e:
+            logger.error(f"Error searching {inbox_folder}: {e}")
+        
+        logger.info(f"\n{'='*50}")
+        logger.info(f"Pair candidates fetched: {len(received)} received, {len(sent)} sent "
+                    f"({self.messages_in_range} emails in the date range)")
+        logger.info('='*50)
+        return received + sent
+    
+    def _search_folder(self, folder_name: str, korean_name: str, start_date: datetime, end_date: datetime) -> List[bytes]:
+        """
+        Select a folder and search it for messages within the date range.
+        
+        Args:
+            folder_name: IMAP folder to select
+            korean_name: Folder name used in log messages
+            start_date: Start of the date range
+            end_date: End of the date range
+        
+        Returns:
+            Message UIDs found (empty if the folder could not be searched)
+        """
+        logger.info(f"\n{'='*50}")
+        logger.info(f"Searching {korean_name} ({folder_name})")
+        logger.info('='*50)
+        
+        # Select the folder
+        status, messages = self.connection.select(folder_name)
+        if status != 'OK':
+            logger.error(f"Failed to select {folder_name}")
+            return []
+        self.selected_folder = folder_name
+        
+        # UIDs are only stable while UIDVALIDITY is, so it is part of the cache key
+        _, uidvalidity = self.connection.response('UIDVALIDITY')
+        self.uidvalidity = int(uidvalidity[-1]) if uidvalidity and uidvalidity[-1] else None
+        
+        num_messages = int(messages[0].decode())
+        logger.info(f"Total messages in {korean_name}: {num_messages}")
+        
+        # Format dates for IMAP search (DD-MMM-YYYY format)
+        since_date = start_date.strftime('%d-%b-%Y')
+        before_date = (end_date + timedelta(days=1)).strftime('%d-%b-%Y')
+        
+        logger.info(f"Searching for emails from {since_date} to {before_date}")
+        
+        # Search for emails in date range
+        search_criteria = f'(SINCE {since_date} BEFORE {before_date})'
+        logger.info(f"IMAP search criteria: {search_criteria}")
+        
+        status, message_numbers = self.connection.uid('SEARCH', None, search_criteria)
+        
+        if status != 'OK':
+            logger.error(f"Failed to search emails in {folder_name}")
+            return []
+        
+        # Get list of message UIDs
+        msg_ids = message_numbers[0].split()
+        logger.info(f"Found {len(msg_ids)} messages in {korean_name} within date range")
+        return msg_ids
+    
     def _find_inbox_folder(self) -> str:
         """Find the INBOX folder name."""
         return "INBOX"  # INBOX is standard
@@ -368,33 +882,214 @@ class GmailIMAPClient:
             logger.error(f"Error finding sent folder: {e}")
             return '[Gmail]/Sent Mail'  # Default fallback
     
-    def _fetch_messages_from_folder(self, msg_ids: List[bytes], start_date: datetime, 
-                                   end_date: datetime, folder_name: str) -> List[email.message.EmailMessage]:
-        """Fetch messages from a specific folder."""
-        emails = []
-        num_messages = len(msg_ids)
+    def _fetch_batched(self, msg_ids: List[bytes], message_parts: str) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        FETCH message_parts for msg_ids, FETCH_BATCH_SIZE messages per command.
+        
+        When there is more than one batch, the batches are spread over up to
+        pool_size connections fetching in parallel, and each connection
+        pipelines up to IMAP_PIPELINE_DEPTH batches at a time; results still come
+        in msg_ids order (per group of pipelined batches, in server order).
+        
+        Args:
+            msg_ids: Message UIDs in the selected folder
+            message_parts: FETCH data items, e.g. '(RFC822)'
+        
+        Yields:
+            Tuple of (message UID, fetched data) for each returned message
+        """
+        batches = [msg_ids[start:start + FETCH_BATCH_SIZE] for start in range(0, len(msg_ids), FETCH_BATCH_SIZE)]
+        if not batches:
+            return
+        connections = self._get_pool_connections(len(batches))
         
-        # Log initial progress information
-        logger.info(f"PROGRESS|TOTAL|{num_messages}")
+        # Pipeline at most each connection's share of the batches, so the whole pool stays busy
+        depth = min(IMAP_PIPELINE_DEPTH, -(-len(batches) // len(connections)))
+        groups = [batches[start:start + depth] for start in range(0, len(batches), depth)]
         
-        # Fetch messages
-        for idx, msg_id in enumerate(msg_ids, 1):
+        def fetch_group(connection, group):
             try:
-                logger.info("=" * 40)
-                logger.info(f"Processing {folder_name} message {idx}/{num_messages}")
-                logger.info(f"PROGRESS|CURRENT|{idx}|{num_messages}")
+                return self._fetch_batch(connection, group, message_parts)
+            except imaplib.IMAP4.error as e:
+                # A BAD response or dropped connection loses only this group, like a failed status
+                return str(e), []
+        
+        with ThreadPoolExecutor(max_workers=len(connections)) as executor:
+            if len(connections) > 1:
+                logger.info(f"Fetching {len(batches)} batches over {len(connections)} IMAP connections")
+                # Each group checks out an idle connection, so no connection is used by two threads at once
+                idle = queue.Queue()
+                for connection in connections:
+                    idle.put(connection)
                 
-                # First fetch headers only for quick date check
-                logger.info(f"Fetching headers for message {idx}...")
-                status, msg_data = self.connection.fetch(msg_id, '(BODY.PEEK[HEADER])')
+                def fetch_pooled_group(group):
+                    connection = idle.get()
+                    try:
+                        return fetch_group(connection, group)
+                    finally:
+                        idle.put(connection)
                 
+                # Run each group in a copy of this thread's context, so log records from
+                # the fetch still reach the caller's session stream
+                futures = [executor.submit(contextvars.copy_context().run, fetch_pooled_group, group) for group in groups]
+                results = (future.result() for future in futures)
+            else:
+                results = (fetch_group(self.connection, group) for group in groups)
+            
+            for group, (status, msg_data) in zip(groups, results):
+                # A failed group may still have returned the messages of its other batches
                 if status != 'OK':
-                    logger.warning(f"Failed to fetch headers for message {msg_id}")
-                    continue
+                    logger.warning(f"Failed to fetch some of messages {group[0][0].decode()}-{group[-1][-1].decode()}: {status}")
                 
+                # Each message comes back as a (b'<seq> (UID <uid> <items> {<size>}', data) tuple
+                # followed by b')'; servers may also send the UID after the data, in that b'...)' part
+                pending = None
+                for item in msg_data:
+                    if isinstance(item, tuple):
+                        match = FETCH_RESPONSE_UID.search(item[0])
+                        if match:
+                            yield match.group(1), item[1]
+                        else:
+                            pending = item[1]
+                    elif pending is not None:
+                        match = FETCH_RESPONSE_UID.search(item)
+                        if match:
+                            yield match.group(1), pending
+                        pending = None
+    
+    def _get_pool_connections(self, num_batches: int) -> list:
+        """
+        Get the connections to fetch num_batches batches with, opening pooled ones as needed.
+        
+        Returns:
+            The main connection followed by up to pool_size - 1 pooled connections
+        """
+        wanted = max(min(self.pool_size, num_batches) - 1, 0)
+        if len(self.pool) < wanted:
+            for connection in self.connect_pool(wanted - len(self.pool)):
+                self.pool[connection] = None
+        return [self.connection] + list(self.pool)[:wanted]
+    
+    def _fetch_batch(self, connection, batches: List[List[bytes]], message_parts: str) -> tuple:
+        """
+        FETCH a group of batches on the given connection, first selecting the current folder on pooled ones.
+        
+        The batches' UID FETCH commands are pipelined: all are sent before any
+        response is read, so the group costs one round trip instead of one per batch.
+        Runs on pool threads; the caller reports failures.
+        
+        Returns:
+            Tuple of ('OK' or the first failed command's status, FETCH data of all batches)
+        """
+        if connection is not self.connection and self.pool[connection] != self.selected_folder:
+            status, _ = connection.select(self.selected_folder)
+            if status != 'OK':
+                return status, []
+            self.pool[connection] = self.selected_folder
+        if len(batches) == 1:
+            return self._fetch_uids(connection, batches[0], message_parts)
+        
+        results, msg_data = connection.uid_fetch_pipelined([b','.join(batch) for batch in batches], message_parts)
+        status = 'OK'
+        for batch, result in zip(batches, results):
+            if isinstance(result, imaplib.IMAP4.error):
+                # Rejected outright (e.g. too long): fetch it again on its own, splitting if needed
+                result, retried = self._fetch_uids(connection, batch, message_parts)
+                msg_data += retried
+            if result != 'OK' and status == 'OK':
+                status = result
+        return status, msg_data
+    
+    def _fetch_uids(self, connection, batch: List[bytes], message_parts: str) -> tuple:
+        """
+        UID FETCH a batch, splitting it in half whenever the server rejects the command as too long.
+        
+        Gmail answers an overly long UID list with "parse error: maximum request size exceeded".
+        
+        Returns:
+            The (status, data) response, combined over the halves if the batch was split
+        """
+        try:
+            return connection.uid('FETCH', b','.join(batch), message_parts)
+        except imaplib.IMAP4.error as e:
+            if len(batch) < 2 or 'request size' not in str(e).lower():
+                raise
+        
+        middle = len(batch) // 2
+        status, first = self._fetch_uids(connection, batch[:middle], message_parts)
+        if status != 'OK':
+            return status, first
+        status, second = self._fetch_uids(connection, batch[middle:], message_parts)
+        return status, first + second
+    
+    def _fetch_cached(self, msg_ids: List[bytes], message_parts: str, column: str) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Like _fetch_batched, but take what the message cache already holds and store what is fetched.
+        
+        Args:
+            msg_ids: Message UIDs in the selected folder
+            message_parts: FETCH data items, e.g. '(RFC822)'
+            column: Cache column the data is kept in, 'header' or 'message'
+        
+        Yields:
+            Tuple of (message UID, data) for each message, cached ones first
+        """
+        if self.cache is None or self.uidvalidity is None:
+            yield from self._fetch_batched(msg_ids, message_parts)
+            return
+        
+        mailbox = (self.userid, self.selected_folder, self.uidvalidity)
+        cached = self.cache.get(mailbox, column, msg_ids)
+        missing = [msg_id for msg_id in msg_ids if msg_id not in cached]
+        logger.info(f"{len(cached)} of {len(msg_ids)} messages' {column} data found in the local cache")
+        yield from cached.items()
+        
+        fetched = []
+        for msg_id, data in self._fetch_batched(missing, message_parts):
+            fetched.append((msg_id, data))
+            yield msg_id, data
+        if fetched:
+            self.cache.put(mailbox, column, fetched)
+    
+    def _decode_header(self, value: str) -> str:
+        """
+        Unfold a raw header value and decode its RFC 2047 encoded words, e.g. a non-ASCII Subject.
+        
+        The result equals the value policy=default gives for the same header, so it
+        can be compared with headers of fully parsed messages.
+        """
+        value = HEADER_FOLDING.sub('', value)
+        try:
+            return str(make_header(decode_header(value))).strip()
+        except Exception:
+            return value.strip()
+    
+    def _fetch_messages_from_folder(self, msg_ids: List[bytes], start_date: datetime, 
+                                   end_date: datetime, folder_name: str) -> List[email.message.EmailMessage]:
+        """Fetch messages from a specific folder."""
+        num_messages = len(msg_ids)
+        
+        # Log initial progress information (the 'progress' extra is picked up by the web UI's log handler)
+        logger.info(f"PROGRESS|TOTAL|{num_messages}", extra={'progress': f"TOTAL|{num_messages}"})
+        
+        headers = self._fetch_headers(msg_ids, start_date, end_date, folder_name)
+        return self._download_messages([msg_id for msg_id, _ in headers], msg_ids, folder_name)
+    
+    def _fetch_headers(self, msg_ids: List[bytes], start_date: datetime, end_date: datetime,
+                       folder_name: str) -> List[Tuple[bytes, email.message.Message]]:
+        """
+        Fetch the headers of messages, a batch per command, and keep those dated within the range.
+        
+        Returns:
+            List of (message UID, parsed headers) for messages within the range.
+            Header values are raw strings; see _decode_header.
+        """
+        logger.info(f"Fetching headers for {len(msg_ids)} messages...")
+        in_range = []
+        for idx, (msg_id, header_data) in enumerate(self._fetch_cached(msg_ids, HEADER_FETCH_PARTS, 'header'), 1):
+            try:
                 # Parse headers
-                header_data = msg_data[0][1]
-                header_msg = BytesParser(policy=default).parsebytes(header_data)
+                header_msg = HEADER_PARSER.parsebytes(header_data)
                 
                 # Log message info
                 from_addr = header_msg.get('From', 'Unknown')
@@ -403,76 +1098,177 @@ class GmailIMAPClient:
                 msg_date_str = header_msg.get('Date', '')
                 message_id = header_msg.get('Message-ID', 'Unknown')
                 
-                logger.info(f"Message {idx} info:")
-                logger.info(f"  From: {from_addr}")
-                logger.info(f"  To: {to_addr}")
-                logger.info(f"  Subject: {subject}")
-                logger.info(f"  Message-ID: {message_id}")
-                logger.info(f"  Date: {msg_date_str}")
-                logger.info(f"  Folder: {folder_name}")
+                logger.debug("=" * 40)
+                logger.debug("Message %s info:", idx)
+                logger.debug("  From: %s", from_addr)
+                logger.debug("  To: %s", to_addr)
+                logger.debug("  Subject: %s", subject)
+                logger.debug("  Message-ID: %s", message_id)
+                logger.debug("  Date: %s", msg_date_str)
+                logger.debug("  Folder: %s", folder_name)
                 
                 # Parse and check date
                 if msg_date_str:
-                    msg_date = parsedate_to_datetime(msg_date_str)
-                    
-                    # Ensure msg_date has timezone info
-                    if msg_date.tzinfo is None:
-                        msg_date = msg_date.replace(tzinfo=timezone.utc)
+                    msg_date = parse_email_date(msg_date_str)
+                    if msg_date is None:
+                        logger.warning(f"Invalid date header in message {msg_id}: {msg_date_str}")
+                        continue
                     
                     # Log date check
                     if start_date <= msg_date <= end_date:
-                        logger.info(f"  ✓ Date is within range - fetching full message")
+                        logger.debug("  ✓ Date is within range")
                     else:
-                        logger.info(f"  ✗ Date is outside range - skipping")
+                        logger.debug("  ✗ Date is outside range - skipping")
                         continue
                 else:
-                    logger.warning(f"  ⚠ No date header found - fetching anyway")
+                    logger.warning(f"  ⚠ No date header found - keeping anyway")
                 
-                # Fetch full message
-                logger.info(f"Downloading full message {idx}...")
-                status, msg_data = self.connection.fetch(msg_id, '(RFC822)')
-                
-                if status != 'OK':
-                    logger.warning(f"Failed to fetch message {msg_id}")
-                    continue
+                in_range.append((msg_id, header_msg))
                 
+            except Exception as e:
+                logger.warning(f"Error reading headers of message {msg_id}: {e}")
+                continue
+        
+        logger.info(f"{len(in_range)} of {len(msg_ids)} messages in {folder_name} are within the date range")
+        return in_range
+    
+    def _download_messages(self, msg_ids: List[bytes], searched_ids: List[bytes],
+                           folder_name: str) -> List[email.message.EmailMessage]:
+        """
+        Download and parse full messages, a batch per command, reporting progress per batch.
+        
+        Args:
+            msg_ids: Messages to download
+            searched_ids: All messages found in the folder, the basis of the progress count
+            folder_name: Folder name recorded in each message's X-Folder-Name header
+        
+        Returns:
+            Parsed messages
+        """
+        emails = []
+        num_messages = len(searched_ids)
+        position = {msg_id: idx for idx, msg_id in enumerate(searched_ids, 1)}
+        
+        logger.info("=" * 40)
+        logger.info(f"Downloading {len(msg_ids)} messages...")
+        for count, (msg_id, raw_email) in enumerate(self._fetch_cached(msg_ids, '(RFC822)', 'message'), 1):
+            try:
                 # Parse full email
-                raw_email = msg_data[0][1]
                 msg = BytesParser(policy=default).parsebytes(raw_email)
                 
                 # Add folder information to the email message
                 msg.add_header('X-Folder-Name', folder_name)
                 
-                # Log parsing details
-                logger.info(f"  Email parsing:")
-                logger.info(f"    Multipart: {msg.is_multipart()}")
-                logger.info(f"    Content-Type: {msg.get_content_type()}")
-                logger.info(f"    Charset: {msg.get_content_charset()}")
-                
                 emails.append(msg)
-                logger.info(f"  ✓ Message {idx} INCLUDED in results")
+                logger.debug("  ✓ Message %s INCLUDED in results", position[msg_id])
                 
-                # Log progress every 50 messages
-                if idx % 50 == 0:
-                    logger.info(f"\n=== Progress: {idx}/{num_messages} messages processed ({len(emails)} included) ===\n")
-                    
             except Exception as e:
-                logger.warning(f"Error fetching message {msg_id}: {e}")
-                continue
+                logger.warning(f"Error parsing message {msg_id}: {e}")
+            
+            # Report progress once per downloaded batch
+            if count % FETCH_BATCH_SIZE == 0:
+                idx = position[msg_id]
+                logger.info(f"PROGRESS|CURRENT|{idx}|{num_messages}",
+                            extra={'progress': f"CURRENT|{idx}|{num_messages}"})
         
+        logger.info(f"PROGRESS|CURRENT|{num_messages}|{num_messages}",
+                    extra={'progress': f"CURRENT|{num_messages}|{num_messages}"})
         logger.info("=" * 40)
         logger.info(f"Fetched {len(emails)} emails from {folder_name} (out of {num_messages} total)")
         return emails
     
     def close(self):
-        """Close the IMAP connection."""
+        """Close the IMAP connection and any pooled connections."""
+        for connection in self.pool:
+            try:
+                self._close_connection(connection)
+            except Exception as e:
+                logger.warning(f"Error closing pooled connection: {e}")
+        self.pool = {}
+        
         if self.connection:
             try:
-                self.connection.close()
-                self.connection.logout()
+                self._close_connection(self.connection)
                 logger.info("Connection closed")
             except Exception as e:
                 logger.warning(f"Error closing connection: {e}")
+        self._release_connections(self.reserved_connections)
+        
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+    
+    def _close_connection(self, connection):
+        """Close the selected folder, if any, and log out."""
+        # CLOSE is only valid with a folder selected; LOGOUT still has to run without one
+        if connection.state == 'SELECTED':
+            connection.close()
+        connection.logout()
+
+
+class IndexedMessage:
+    """
+    An email together with the headers the pairing strategies read.
+    
+    With policy=default every msg.get() parses the header again, so each header
+    is read once when the message is indexed. The Date is only parsed if subject
+    matching asks for it.
+    """
+    
+    __slots__ = ('msg', 'subject', 'from_addr', 'to_addr', 'from_addresses', 'to_addresses',
+                 'in_reply_to', 'references', '_date')
+    
+    def __init__(self, msg: email.message.EmailMessage):
+        self.msg = msg
+        self.subject = msg.get('Subject', '').strip()
+        self.from_addr = msg.get('From', '')
+        self.to_addr = msg.get('To', '')
+        # Bare, normalized addresses for exact comparison with the user's address
+        self.from_addresses = frozenset(normalize_address(addr) for _, addr in getaddresses([str(self.from_addr)]) if addr)
+        self.to_addresses = frozenset(normalize_address(addr) for _, addr in getaddresses([str(self.to_addr)]) if addr)
+        self.in_reply_to = msg.get('In-Reply-To', '')
+        self.references = msg.get('References', '')
+        # False until read; the parsed date may itself be None
+        self._date = False
+    
+    @property
+    def date(self) -> Optional[datetime]:
+        """The parsed Date header, or None if it is missing or invalid."""
+        if self._date is False:
+            self._date = parse_email_date(str(self.msg.get('Date', '')))
+        return self._date
+
+
+class MessagesByDate:
+    """
+    Messages sharing a subject, searchable for the latest one sent before a date.
+    
+    Dates are parsed and sorted on the first search, so subjects that subject
+    matching never reaches cost nothing; later searches are a binary search.
+    """
+    
+    __slots__ = ('messages', '_sorted', '_dates')
+    
+    def __init__(self):
+        self.messages = []
+        self._sorted = None
+        self._dates = None
+    
+    def append(self, message: IndexedMessage):
+        self.messages.append(message)
+        self._sorted = None
+    
+    def latest_before(self, date: datetime) -> Optional[IndexedMessage]:
+        """Return the message with the latest date earlier than date (the first of equals), or None."""
+        if self._sorted is None:
+            # Messages without a valid date can never be the latest one before another
+            self._sorted = sorted((m for m in self.messages if m.date is not None), key=lambda m: m.date)
+            self._dates = [m.date for m in self._sorted]
+        idx = bisect.bisect_left(self._dates, date)
+        if not idx:
+            return None
+        # Of several messages with that latest date, the first one indexed wins (the sort is stable)
+        return self._sorted[bisect.bisect_left(self._dates, self._dates[idx - 1])]
 
 
 class EmailFilter:
@@ -480,6 +1276,12 @@ class EmailFilter:
     
     def __init__(self, userid: str):
         self.userid = userid
+        # Compared exactly: a substring test would also match e.g. "kim" in "kimchi@..."
+        user_address = userid.strip()
+        if '@' not in user_address:
+            # Gmail also accepts the user ID without the domain
+            user_address += '@gmail.com'
+        self.user_address = normalize_address(user_address)
     
     def find_email_pairs(self, emails: List[email.message.EmailMessage]) -> List[EmailPair]:
         """Find pairs of original emails and their responses by analyzing both inbox and sent mail."""
@@ -487,217 +1289,114 @@ class EmailFilter:
         logger.info("Starting enhanced email pairing process...")
         logger.info("=" * 40)
         
-        # Separate emails by folder
-        inbox_emails = []
-        sent_emails = []
-        
-        for msg in emails:
-            folder_name = msg.get('X-Folder-Name', '')
-            if 'Sent' in folder_name or '보낸' in folder_name:
-                sent_emails.append(msg)
-            else:
-                inbox_emails.append(msg)
-        
-        logger.info(f"Separated emails: {len(inbox_emails)} from inbox, {len(sent_emails)} from sent folder")
-        
-        # Build message-ID to email mapping for both folders
-        all_emails_by_id = {}
+        # Build message-ID to email mapping for both folders, keyed by normalized ID
         inbox_by_id = {}
         sent_by_id = {}
         
         # Build subject-based mapping for additional matching
-        inbox_by_subject = {}
-        sent_by_subject = {}
+        inbox_by_subject = defaultdict(MessagesByDate)
+        sent_by_subject = defaultdict(MessagesByDate)
+        
+        # Replies worth pairing, collected in the same pass so the strategies below
+        # only look at them: sent mail from the user, and received mail to the user
+        # that carries reply indicators
+        sent_replies = []
+        inbox_replies = []
+        num_sent = 0
         
         for msg in emails:
-            msg_id = msg.get('Message-ID', '')
-            subject = msg.get('Subject', '').strip()
+            indexed = IndexedMessage(msg)
+            msg_id = self._normalize_message_id(msg.get('Message-ID', ''))
             
             # Normalize subject for matching (remove Re:, Fw:, etc.)
-            normalized_subject = self._normalize_subject(subject)
+            normalized_subject = self._normalize_subject(indexed.subject)
+            
+            folder_name = msg.get('X-Folder-Name', '')
+            if 'Sent' in folder_name or '보낸' in folder_name:
+                num_sent += 1
+                if self.user_address in indexed.from_addresses:
+                    sent_replies.append(indexed)
+                by_id, by_subject = sent_by_id, sent_by_subject
+            else:
+                if self.user_address in indexed.to_addresses and (
+                        indexed.in_reply_to or indexed.references or self._is_reply_subject(indexed.subject)):
+                    inbox_replies.append(indexed)
+                by_id, by_subject = inbox_by_id, inbox_by_subject
             
             if msg_id:
-                all_emails_by_id[msg_id] = msg
-                
-                folder_name = msg.get('X-Folder-Name', '')
-                if 'Sent' in folder_name or '보낸' in folder_name:
-                    sent_by_id[msg_id] = msg
-                    if normalized_subject:
-                        if normalized_subject not in sent_by_subject:
-                            sent_by_subject[normalized_subject] = []
-                        sent_by_subject[normalized_subject].append(msg)
-                else:
-                    inbox_by_id[msg_id] = msg
-                    if normalized_subject:
-                        if normalized_subject not in inbox_by_subject:
-                            inbox_by_subject[normalized_subject] = []
-                        inbox_by_subject[normalized_subject].append(msg)
+                by_id[msg_id] = indexed
+                if normalized_subject:
+                    by_subject[normalized_subject].append(indexed)
         
+        logger.info(f"Separated emails: {len(emails) - num_sent} from inbox, {num_sent} from sent folder")
         logger.info(f"Built message-ID indexes: {len(inbox_by_id)} inbox, {len(sent_by_id)} sent")
         logger.info(f"Built subject indexes: {len(inbox_by_subject)} inbox subjects, {len(sent_by_subject)} sent subjects")
+        logger.info(f"Reply candidates: {len(sent_replies)} from user, {len(inbox_replies)} to user")
         
         pairs = []
         
         # Strategy 1: Find responses in sent folder that reply to inbox emails
         logger.info("\n--- Strategy 1: Finding responses from user to received emails ---")
-        for idx, sent_msg in enumerate(sent_emails, 1):
-            in_reply_to = sent_msg.get('In-Reply-To', '')
-            references = sent_msg.get('References', '')
-            from_addr = sent_msg.get('From', '')
-            subject = sent_msg.get('Subject', 'No Subject')
+        for idx, sent_msg in enumerate(sent_replies, 1):
+            logger.debug("\nAnalyzing sent email %s/%s:", idx, len(sent_replies))
+            logger.debug("  Subject: %s", sent_msg.subject or 'No Subject')
+            logger.debug("  From: %s", sent_msg.from_addr)
+            logger.debug("  In-Reply-To: %s", sent_msg.in_reply_to or 'None')
             
-            logger.info(f"\nAnalyzing sent email {idx}/{len(sent_emails)}:")
-            logger.info(f"  Subject: {subject}")
-            logger.info(f"  From: {from_addr}")
-            logger.info(f"  In-Reply-To: {in_reply_to or 'None'}")
+            # Method 1: Try Message-ID based matching first
+            original, match_method = self._find_referenced(sent_msg.in_reply_to, sent_msg.references, inbox_by_id)
             
-            # Check if sender is the configured user
-            if self.userid in from_addr:
-                original = None
-                match_method = ""
-                
-                # Method 1: Try Message-ID based matching first
-                if in_reply_to and in_reply_to in inbox_by_id:
-                    original = inbox_by_id[in_reply_to]
-                    match_method = "Message-ID (In-Reply-To)"
-                elif references:
-                    # Try to find original in references
-                    ref_ids = references.split()
-                    for ref_id in ref_ids:
-                        if ref_id in inbox_by_id:
-                            original = inbox_by_id[ref_id]
-                            match_method = "Message-ID (References)"
-                            break
-                
-                # Method 2: If Message-ID matching failed, try subject-based matching
-                if not original:
-                    normalized_subject = self._normalize_subject(subject)
-                    if normalized_subject and self._is_reply_subject(subject):
-                        logger.info(f"  Trying subject-based matching for: {normalized_subject}")
-                        
-                        if normalized_subject in inbox_by_subject:
-                            # Find the most recent original email with this subject
-                            candidates = inbox_by_subject[normalized_subject]
-                            sent_date = parsedate_to_datetime(sent_msg.get('Date', ''))
-                            
-                            best_candidate = None
-                            min_time_diff = None
-                            
-                            for candidate in candidates:
-                                candidate_date = parsedate_to_datetime(candidate.get('Date', ''))
-                                if candidate_date and sent_date and candidate_date < sent_date:
-                                    time_diff = (sent_date - candidate_date).total_seconds()
-                                    if min_time_diff is None or time_diff < min_time_diff:
-                                        min_time_diff = time_diff
-                                        best_candidate = candidate
-                            
-                            if best_candidate:
-                                original = best_candidate
-                                match_method = "Subject-based"
-                                logger.info(f"  Found original via subject matching (time diff: {min_time_diff/3600:.1f} hours)")
+            # Method 2: If Message-ID matching failed, try subject-based matching
+            if not original:
+                original, match_method = self._find_by_subject(sent_msg, inbox_by_subject)
+            
+            if original:
+                logger.debug("  ✓ Found original email via %s:", match_method)
+                logger.debug("    Original From: %s", original.from_addr or 'Unknown')
+                logger.debug("    Original Subject: %s", original.subject or 'No Subject')
                 
-                if original:
-                    original_from = original.get('From', 'Unknown')
-                    original_subject = original.get('Subject', 'No Subject')
-                    
-                    logger.info(f"  ✓ Found original email via {match_method}:")
-                    logger.info(f"    Original From: {original_from}")
-                    logger.info(f"    Original Subject: {original_subject}")
-                    
-                    # Check if original sender is the configured user (GMAIL_USERID)
-                    if self.userid in original_from:
-                        logger.info(f"  ✗ EXCLUDED - Original sender is GMAIL_USERID ({self.userid})")
-                    else:
-                        pair = EmailPair(original, sent_msg)
-                        pairs.append(pair)
-                        logger.info(f"  ✓ PAIR CREATED (Total pairs: {len(pairs)})")
+                # Check if original sender is the configured user (GMAIL_USERID)
+                if self.user_address in original.from_addresses:
+                    logger.debug("  ✗ EXCLUDED - Original sender is GMAIL_USERID (%s)", self.userid)
                 else:
-                    logger.info(f"  ✗ Original email not found (tried both Message-ID and subject matching)")
+                    pair = EmailPair(original.msg, sent_msg.msg)
+                    pairs.append(pair)
+                    logger.debug("  ✓ PAIR CREATED (Total pairs: %s)", len(pairs))
             else:
-                logger.info(f"  ✗ Not from configured user")
+                logger.debug("  ✗ Original email not found (tried both Message-ID and subject matching)")
         
         # Strategy 2: Find responses in inbox that are replies to sent emails
         logger.info("\n--- Strategy 2: Finding responses to user's sent emails ---")
-        for idx, inbox_msg in enumerate(inbox_emails, 1):
-            in_reply_to = inbox_msg.get('In-Reply-To', '')
-            references = inbox_msg.get('References', '')
-            from_addr = inbox_msg.get('From', '')
-            to_addr = inbox_msg.get('To', '')
-            subject = inbox_msg.get('Subject', 'No Subject')
+        for idx, inbox_msg in enumerate(inbox_replies, 1):
+            logger.debug("\nAnalyzing inbox email %s/%s:", idx, len(inbox_replies))
+            logger.debug("  Subject: %s", inbox_msg.subject or 'No Subject')
+            logger.debug("  From: %s", inbox_msg.from_addr)
+            logger.debug("  To: %s", inbox_msg.to_addr)
+            logger.debug("  In-Reply-To: %s", inbox_msg.in_reply_to or 'None')
             
-            logger.info(f"\nAnalyzing inbox email {idx}/{len(inbox_emails)}:")
-            logger.info(f"  Subject: {subject}")
-            logger.info(f"  From: {from_addr}")
-            logger.info(f"  To: {to_addr}")
-            logger.info(f"  In-Reply-To: {in_reply_to or 'None'}")
+            # Method 1: Try Message-ID based matching first
+            original, match_method = self._find_referenced(inbox_msg.in_reply_to, inbox_msg.references, sent_by_id)
             
-            # Check if this is a response to user's email
-            if self.userid in to_addr and (in_reply_to or references or self._is_reply_subject(subject)):
-                original = None
-                match_method = ""
-                
-                # Method 1: Try Message-ID based matching first
-                if in_reply_to and in_reply_to in sent_by_id:
-                    original = sent_by_id[in_reply_to]
-                    match_method = "Message-ID (In-Reply-To)"
-                elif references:
-                    # Try to find original in references
-                    ref_ids = references.split()
-                    for ref_id in ref_ids:
-                        if ref_id in sent_by_id:
-                            original = sent_by_id[ref_id]
-                            match_method = "Message-ID (References)"
-                            break
-                
-                # Method 2: If Message-ID matching failed, try subject-based matching
-                if not original:
-                    normalized_subject = self._normalize_subject(subject)
-                    if normalized_subject and self._is_reply_subject(subject):
-                        logger.info(f"  Trying subject-based matching for: {normalized_subject}")
-                        
-                        if normalized_subject in sent_by_subject:
-                            # Find the most recent original email with this subject
-                            candidates = sent_by_subject[normalized_subject]
-                            inbox_date = parsedate_to_datetime(inbox_msg.get('Date', ''))
-                            
-                            best_candidate = None
-                            min_time_diff = None
-                            
-                            for candidate in candidates:
-                                candidate_date = parsedate_to_datetime(candidate.get('Date', ''))
-                                if candidate_date and inbox_date and candidate_date < inbox_date:
-                                    time_diff = (inbox_date - candidate_date).total_seconds()
-                                    if min_time_diff is None or time_diff < min_time_diff:
-                                        min_time_diff = time_diff
-                                        best_candidate = candidate
-                            
-                            if best_candidate:
-                                original = best_candidate
-                                match_method = "Subject-based"
-                                logger.info(f"  Found original via subject matching (time diff: {min_time_diff/3600:.1f} hours)")
+            # Method 2: If Message-ID matching failed, try subject-based matching
+            if not original:
+                original, match_method = self._find_by_subject(inbox_msg, sent_by_subject)
+            
+            if original:
+                logger.debug("  ✓ Found original email via %s:", match_method)
+                logger.debug("    Original From: %s", original.from_addr or 'Unknown')
+                logger.debug("    Original To: %s", original.to_addr or 'Unknown')
+                logger.debug("    Original Subject: %s", original.subject or 'No Subject')
                 
-                if original:
-                    original_to = original.get('To', 'Unknown')
-                    original_from = original.get('From', 'Unknown')
-                    original_subject = original.get('Subject', 'No Subject')
-                    
-                    logger.info(f"  ✓ Found original email via {match_method}:")
-                    logger.info(f"    Original From: {original_from}")
-                    logger.info(f"    Original To: {original_to}")
-                    logger.info(f"    Original Subject: {original_subject}")
-                    
-                    # Check if original sender is the configured user (GMAIL_USERID)
-                    if self.userid in original_from:
-                        logger.info(f"  ✗ EXCLUDED - Original sender is GMAIL_USERID ({self.userid})")
-                    else:
-                        # In this case, the "request" is the sent email and "response" is the inbox email
-                        pair = EmailPair(original, inbox_msg)
-                        pairs.append(pair)
-                        logger.info(f"  ✓ PAIR CREATED (Total pairs: {len(pairs)})")
+                # Check if original sender is the configured user (GMAIL_USERID)
+                if self.user_address in original.from_addresses:
+                    logger.debug("  ✗ EXCLUDED - Original sender is GMAIL_USERID (%s)", self.userid)
                 else:
-                    logger.info(f"  ✗ Original email not found (tried both Message-ID and subject matching)")
+                    # In this case, the "request" is the sent email and "response" is the inbox email
+                    pair = EmailPair(original.msg, inbox_msg.msg)
+                    pairs.append(pair)
+                    logger.debug("  ✓ PAIR CREATED (Total pairs: %s)", len(pairs))
             else:
-                logger.info(f"  ✗ Not addressed to configured user or no reply indicators")
+                logger.debug("  ✗ Original email not found (tried both Message-ID and subject matching)")
         
         # Remove duplicates based on message IDs
         unique_pairs = []
@@ -712,13 +1411,72 @@ class EmailFilter:
                 unique_pairs.append(pair)
                 seen_combinations.add(combination)
             else:
-                logger.info(f"Removed duplicate pair: {request_id} -> {response_id}")
+                logger.debug("Removed duplicate pair: %s -> %s", request_id, response_id)
         
         logger.info("\n" + "=" * 40)
         logger.info(f"Found {len(unique_pairs)} unique email pairs (removed {len(pairs) - len(unique_pairs)} duplicates)")
         logger.info("=" * 40 + "\n")
         return unique_pairs
     
+    def _normalize_message_id(self, message_id: str) -> str:
+        """Normalize a Message-ID for matching by stripping whitespace and angle brackets."""
+        return message_id.strip().strip('<>').strip() if message_id else ''
+    
+    def _find_referenced(self, in_reply_to: str, references: str,
+                         emails_by_id: Dict[str, IndexedMessage]) -> Tuple[Optional[IndexedMessage], str]:
+        """
+        Find the email a reply refers to by its In-Reply-To, then its References in order.
+        
+        Args:
+            in_reply_to: In-Reply-To header of the reply
+            references: References header of the reply
+            emails_by_id: Candidate originals keyed by normalized Message-ID
+        
+        Returns:
+            Tuple of (original email or None, match method description)
+        """
+        original = emails_by_id.get(self._normalize_message_id(in_reply_to)) if in_reply_to else None
+        if original is not None:
+            return original, "Message-ID (In-Reply-To)"
+        
+        for ref_id in references.split():
+            original = emails_by_id.get(self._normalize_message_id(ref_id))
+            if original is not None:
+                return original, "Message-ID (References)"
+        
+        return None, ""
+    
+    def _find_by_subject(self, reply: IndexedMessage,
+                         emails_by_subject: Dict[str, MessagesByDate]) -> Tuple[Optional[IndexedMessage], str]:
+        """
+        Find the email a reply answers by its subject: the latest one sent before the reply.
+        
+        Args:
+            reply: The reply email; only subjects marked as replies are matched
+            emails_by_subject: Candidate originals keyed by normalized subject
+        
+        Returns:
+            Tuple of (original email or None, match method description)
+        """
+        normalized_subject = self._normalize_subject(reply.subject)
+        if not normalized_subject or not self._is_reply_subject(reply.subject):
+            return None, ""
+        
+        logger.debug("  Trying subject-based matching for: %s", normalized_subject)
+        candidates = emails_by_subject.get(normalized_subject)
+        if not candidates:
+            return None, ""
+        
+        # Find the most recent original email with this subject
+        reply_date = reply.date
+        best_candidate = candidates.latest_before(reply_date) if reply_date else None
+        if best_candidate is None:
+            return None, ""
+        
+        min_time_diff = (reply_date - best_candidate.date).total_seconds()
+        logger.debug("  Found original via subject matching (time diff: %.1f hours)", min_time_diff / 3600)
+        return best_candidate, "Subject-based"
+    
     def _normalize_subject(self, subject: str) -> str:
         """Normalize email subject by removing reply/forward prefixes."""
         if not subject:
@@ -776,8 +1534,8 @@ class EmailFilter:
             request_text = pair.get_request_text()
             subject = pair.request.get('Subject', 'No Subject')
             
-            logger.info(f"\nChecking pair {idx}/{len(pairs)}:")
-            logger.info(f"  Subject: {subject}")
+            logger.debug("\nChecking pair %s/%s:", idx, len(pairs))
+            logger.debug("  Subject: %s", subject)
             
             # Check if all keywords are present
             found_keywords = []
@@ -789,12 +1547,12 @@ class EmailFilter:
                 else:
                     missing_keywords.append(keyword)
             
-            logger.info(f"  Found keywords: {found_keywords}")
+            logger.debug("  Found keywords: %s", found_keywords)
             if missing_keywords:
-                logger.info(f"  Missing keywords: {missing_keywords}")
-                logger.info(f"  ✗ EXCLUDED - Not all keywords present")
+                logger.debug("  Missing keywords: %s", missing_keywords)
+                logger.debug("  ✗ EXCLUDED - Not all keywords present")
             else:
-                logger.info(f"  ✓ INCLUDED - All keywords present")
+                logger.debug("  ✓ INCLUDED - All keywords present")
                 filtered.append(pair)
         
         logger.info("\n" + "=" * 40)
@@ -802,31 +1560,43 @@ class EmailFilter:
         logger.info("=" * 40 + "\n")
         return filtered
     
-    def filter_by_student_id(self, pairs: List[EmailPair]) -> List[EmailPair]:
-        """Filter pairs where original email contains an 8-digit number (student ID)."""
-        pattern = re.compile(r'\d{8}')
+    def filter_by_student_id(self, pairs: List[EmailPair], student_id_length: int = 8,
+                             strict_mode: bool = False) -> List[EmailPair]:
+        """
+        Filter pairs where the original email contains a student ID number.
+        
+        Args:
+            pairs: Email pairs to filter
+            student_id_length: Number of digits in a student ID (default: 8)
+            strict_mode: When True, also accept a student ID in the subject (default: False)
+        
+        Returns:
+            Pairs whose original email contains a student ID
+        """
+        # The default length uses the precompiled pattern
+        pattern = STUDENT_ID_PATTERN if student_id_length == 8 else re.compile(rf'\d{{{student_id_length}}}')
         
         logger.info("\n" + "=" * 40)
-        logger.info("Filtering by student ID (8-digit pattern)")
+        logger.info(f"Filtering by student ID ({student_id_length}-digit pattern, strict_mode={strict_mode})")
         logger.info("=" * 40)
         
         filtered = []
         
         for idx, pair in enumerate(pairs, 1):
-            request_text = pair.get_request_text()
             subject = pair.request.get('Subject', 'No Subject')
             
-            logger.info(f"\nChecking pair {idx}/{len(pairs)}:")
-            logger.info(f"  Subject: {subject}")
+            logger.debug("\nChecking pair %s/%s:", idx, len(pairs))
+            logger.debug("  Subject: %s", subject)
             
-            match = pattern.search(request_text)
+            # The subject is short, so check it before the body
+            match = (strict_mode and pattern.search(subject)) or pattern.search(pair.get_request_text())
             if match:
-                logger.info(f"  ✓ Found student ID: {match.group()}")
-                logger.info(f"  ✓ INCLUDED")
+                logger.debug("  ✓ Found student ID: %s", match.group())
+                logger.debug("  ✓ INCLUDED")
                 filtered.append(pair)
             else:
-                logger.info(f"  ✗ No student ID found")
-                logger.info(f"  ✗ EXCLUDED")
+                logger.debug("  ✗ No student ID found")
+                logger.debug("  ✗ EXCLUDED")
         
         logger.info("\n" + "=" * 40)
         logger.info(f"After student ID filtering: {len(filtered)}/{len(pairs)} pairs")
@@ -834,6 +1604,23 @@ class EmailFilter:
         return filtered
 
 
+def pair_to_row(pair: EmailPair) -> tuple:
+    """Build a report row for an email pair, in REPORT_COLUMNS order."""
+    return (
+        pair.get_date(),
+        pair.get_start_time(),
+        pair.get_end_time(),
+        '연구실',
+        pair.get_student_name(),
+        pair.get_student_id(),
+        pair.get_request_from(),
+        pair.get_request_to(),
+        pair.get_request_subject(),
+        pair.get_request_text(),
+        pair.get_response_text()
+    )
+
+
 def create_excel_report(pairs: List[EmailPair], output_file: str):
     """Create Excel report from email pairs."""
     if not pairs:
@@ -844,55 +1631,59 @@ def create_excel_report(pairs: List[EmailPair], output_file: str):
     logger.info("Creating Excel report...")
     logger.info("=" * 40)
     
-    # Prepare data
-    data = []
+    # Rows are flushed to disk one by one instead of keeping the whole sheet in memory,
+    # and text cells (e.g. student IDs, URLs) stay strings
+    logger.info(f"Exporting {len(pairs)} rows to Excel file: {output_file}")
+    workbook = xlsxwriter.Workbook(output_file, EXCEL_WORKBOOK_OPTIONS)
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, REPORT_COLUMNS)
+    
+    log_pairs = logger.isEnabledFor(logging.DEBUG)
     for idx, pair in enumerate(pairs, 1):
-        logger.info(f"\nProcessing pair {idx}/{len(pairs)} for Excel:")
-        logger.info(f"  Date: {pair.get_date()}")
-        logger.info(f"  Start Time: {pair.get_start_time()}")
-        logger.info(f"  End Time: {pair.get_end_time()}")
-        logger.info(f"  From: {pair.get_request_from()}")
-        logger.info(f"  To: {pair.get_request_to()}")
-        logger.info(f"  Subject: {pair.get_request_subject()}")
-        logger.info(f"  Request length: {len(pair.get_request_text())} characters")
-        logger.info(f"  Response length: {len(pair.get_response_text())} characters")
-        
-        data.append({
-            '상담일': pair.get_date(),
-            '시작시간': pair.get_start_time(),
-            '종료시간': pair.get_end_time(),
-            '장소': '연구실',
-            '학생': pair.get_student_name(),
-            '학번': pair.get_student_id(),
-            '발신자 이메일 주소': pair.get_request_from(),
-            '수신자 이메일 주소': pair.get_request_to(),
-            '메일의 제목': pair.get_request_subject(),
-            '상담요청 내용': pair.get_request_text(),
-            '교수 답변': pair.get_response_text()
-        })
-    
-    # Create DataFrame
-    logger.info(f"\nCreating DataFrame with {len(data)} rows...")
-    df = pd.DataFrame(data)
-    
-    # Ensure student ID is treated as string (not numeric)
-    # Replace empty strings with actual empty strings for display
-    if '학번' in df.columns:
-        df['학번'] = df['학번'].fillna('')
-    if '학생' in df.columns:
-        df['학생'] = df['학생'].fillna('')
-    
-    # Export to Excel
-    logger.info(f"Exporting to Excel file: {output_file}")
-    df.to_excel(output_file, index=False, engine='openpyxl')
+        if log_pairs:
+            logger.debug("\nProcessing pair %s/%s for Excel:", idx, len(pairs))
+            logger.debug("  Date: %s", pair.get_date())
+            logger.debug("  Start Time: %s", pair.get_start_time())
+            logger.debug("  End Time: %s", pair.get_end_time())
+            logger.debug("  From: %s", pair.get_request_from())
+            logger.debug("  To: %s", pair.get_request_to())
+            logger.debug("  Subject: %s", pair.get_request_subject())
+            logger.debug("  Request length: %s characters", len(pair.get_request_text()))
+            logger.debug("  Response length: %s characters", len(pair.get_response_text()))
+        
+        worksheet.write_row(idx, 0, pair_to_row(pair))
+    
+    workbook.close()
     
     logger.info("=" * 40)
     logger.info(f"Excel report created: {output_file}")
     logger.info("=" * 40 + "\n")
 
 
+def normalize_date_range(start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+    """
+    Make end_date inclusive (end of day) and give both dates timezone info.
+    
+    Args:
+        start_date: Start date for email search
+        end_date: End date for email search
+    
+    Returns:
+        Tuple of (start_date, end_date) as passed to GmailIMAPClient.fetch_emails
+    """
+    end_date = end_date.replace(hour=23, minute=59, second=59)
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    return start_date, end_date
+
+
 def process_emails(gmail_userid: str, gmail_password: str, start_date: datetime, end_date: datetime,
-                   keywords: List[str] = None, student_id_length: int = 8, strict_mode: bool = True) -> Tuple[List[EmailPair], str]:
+                   keywords: List[str] = None, student_id_length: int = 8, strict_mode: bool = True,
+                   emails: List[email.message.EmailMessage] = None,
+                   cache_path: Optional[str] = None,
+                   pool_size: int = IMAP_POOL_SIZE) -> Tuple[List[EmailPair], str]:
     """
     Process emails and return pairs and any error message.
     
@@ -904,6 +1695,10 @@ def process_emails(gmail_userid: str, gmail_password: str, start_date: datetime,
         keywords: Optional list of keywords to filter by (default: ["교수님", "안녕하세요", "입니다"])
         student_id_length: Length of student ID to filter by (default: 8)
         strict_mode: When True, only process emails with student ID in subject or body (default: True)
+        emails: Emails already fetched with GmailIMAPClient.fetch_pair_candidates for
+            normalize_date_range(start_date, end_date); when given, Gmail is not contacted again (default: None)
+        cache_path: SQLite file caching fetched messages across runs, or None to disable (default: None)
+        pool_size: Maximum IMAP connections to fetch with in parallel (default: IMAP_POOL_SIZE)
     
     Returns:
         Tuple of (list of EmailPair objects, error message or empty string)
@@ -911,25 +1706,22 @@ def process_emails(gmail_userid: str, gmail_password: str, start_date: datetime,
     if keywords is None:
         keywords = ["교수님", "안녕하세요", "입니다"]
     
-    # Make end_date inclusive (end of day) and ensure timezone info
-    end_date = end_date.replace(hour=23, minute=59, second=59)
-    if start_date.tzinfo is None:
-        start_date = start_date.replace(tzinfo=timezone.utc)
-    if end_date.tzinfo is None:
-        end_date = end_date.replace(tzinfo=timezone.utc)
-    
-    logger.info(f"Fetching emails from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-    
-    # Connect to Gmail
-    client = GmailIMAPClient(gmail_userid, gmail_password)
-    connect_result = client.connect()
-    if connect_result is not True:
-        # Return specific error message from connect method
-        return [], connect_result if isinstance(connect_result, str) else "Failed to connect to Gmail. Please check credentials and ensure POP is enabled."
+    client = None
+    if emails is None:
+        start_date, end_date = normalize_date_range(start_date, end_date)
+        logger.info(f"Fetching emails from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        
+        # Connect to Gmail
+        client = GmailIMAPClient(gmail_userid, gmail_password, cache_path, pool_size)
+        connect_result = client.connect()
+        if connect_result is not True:
+            # Return specific error message from connect method
+            return [], connect_result if isinstance(connect_result, str) else "Failed to connect to Gmail. Please check credentials and ensure POP is enabled."
     
     try:
-        # Fetch emails
-        emails = client.fetch_emails(start_date, end_date)
+        # Fetch the emails that can form pairs
+        if client is not None:
+            emails = client.fetch_pair_candidates(start_date, end_date)
         
         if not emails:
             return [], "No emails found in the specified date range"
@@ -949,24 +1741,9 @@ def process_emails(gmail_userid: str, gmail_password: str, start_date: datetime,
         if not pairs:
             return [], "No emails matching keyword criteria"
         
-        # Filter by student ID
+        # Filter by student ID (in strict mode, subject or body; otherwise body only)
         if student_id_length > 0:
-            pattern = re.compile(rf'\d{{{student_id_length}}}')
-            filtered = []
-            for pair in pairs:
-                request_text = pair.get_request_text()
-                request_subject = pair.request.get('Subject', '')
-                
-                # In strict mode, check both subject and body
-                if strict_mode:
-                    if pattern.search(request_subject) or pattern.search(request_text):
-                        filtered.append(pair)
-                else:
-                    # Non-strict mode: only check body (legacy behavior)
-                    if pattern.search(request_text):
-                        filtered.append(pair)
-            pairs = filtered
-            logger.info(f"After student ID filtering (strict_mode={strict_mode}): {len(pairs)} pairs")
+            pairs = filter_obj.filter_by_student_id(pairs, student_id_length, strict_mode)
         
         if not pairs:
             return [], "No emails containing student ID"
@@ -978,7 +1755,8 @@ def process_emails(gmail_userid: str, gmail_password: str, start_date: datetime,
         logger.error(f"Error processing emails: {e}")
         return [], f"Error processing emails: {str(e)}"
     finally:
-        client.close()
+        if client is not None:
+            client.close()
 
 
 def main():
@@ -997,12 +1775,19 @@ Examples:
   
   # Process emails without strict mode (legacy behavior)
   python main.py 2025-01-01 2025-01-31 --no-strict
+  
+  # Keep fetched emails in a local cache so later runs only download new ones
+  python main.py 2025-01-01 2025-01-31 --cache
         """
     )
     parser.add_argument('start_date', nargs='?', help='Start date (YYYY-MM-DD format)')
     parser.add_argument('end_date', nargs='?', help='End date (YYYY-MM-DD format)')
     parser.add_argument('--no-strict', action='store_true', 
                        help='Disable strict mode (only check student ID in body, not subject)')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='PATH',
+                       help=f'Cache fetched emails in a local SQLite file (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--connections', type=int, default=IMAP_POOL_SIZE, metavar='N',
+                       help=f'Maximum IMAP connections to fetch with in parallel (default: {IMAP_POOL_SIZE})')
     
     args = parser.parse_args()
     
@@ -1017,8 +1802,8 @@ Examples:
     # Get date range from command line arguments or use defaults
     if args.start_date and args.end_date:
         try:
-            start_date = datetime.strptime(args.start_date, '%Y-%m-%d')
-            end_date = datetime.strptime(args.end_date, '%Y-%m-%d')
+            start_date = datetime.fromisoformat(args.start_date)
+            end_date = datetime.fromisoformat(args.end_date)
         except ValueError:
             logger.error("Date format should be YYYY-MM-DD")
             logger.error("Usage: python main.py <start_date> <end_date> [--no-strict]")
@@ -1035,7 +1820,7 @@ Examples:
     
     # Process emails
     pairs, error = process_emails(gmail_userid, gmail_password, start_date, end_date, 
-                                  strict_mode=strict_mode)
+                                  strict_mode=strict_mode, cache_path=args.cache, pool_size=args.connections)
     
     if error:
         logger.error(error)
@@ -0,0 +1,87 @@
+"""
+Tests of the xlsx report writers in main.py and app.py.
+
+Workbooks are read back with openpyxl to check that every cell keeps the exact text it
+was given.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app  # noqa: E402
+import main  # noqa: E402
+
+
+# A row xlsxwriter would otherwise turn into a truncated link, a formula and a number
+ROW = ('a', 'https://example.com/' + 'x' * 2100, 'x', '=1+1', '20241234')
+
+
+def read_rows(path: str) -> list:
+    """Return the cell values of the first sheet of an xlsx file."""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return [row for row in workbook.active.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+class CreateExcelReportTest(unittest.TestCase):
+    def test_keeps_cell_text_as_written(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'report.xlsx')
+            with mock.patch.object(main, 'pair_to_row', return_value=ROW):
+                main.create_excel_report([object()], path)
+            rows = read_rows(path)
+
+        self.assertEqual(rows[0][:len(main.REPORT_COLUMNS)], main.REPORT_COLUMNS)
+        self.assertEqual(rows[1][:len(ROW)], ROW)
+
+
+class StreamExcelTest(unittest.TestCase):
+    def test_keeps_cell_text_as_written(self):
+        columns = [f'col{idx}' for idx in range(len(ROW))]
+        content = b''.join(app.stream_excel(columns, [ROW], app.REPORT_SHEET_NAME))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'report.xlsx')
+            with open(path, 'wb') as f:
+                f.write(content)
+            rows = read_rows(path)
+
+        self.assertEqual(rows, [tuple(columns), ROW])
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app.app.test_client()
+
+    def test_streams_uploaded_rows(self):
+        columns = [f'col{idx}' for idx in range(len(ROW))]
+        response = self.client.post('/download', json={'columns': columns, 'rows': [list(ROW)]})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'report.xlsx')
+            with open(path, 'wb') as f:
+                f.write(response.get_data())
+            rows = read_rows(path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rows, [tuple(columns), ROW])
+
+    def test_rejects_malformed_tables_before_streaming(self):
+        for payload in ({'data': 'abc'}, {'data': [['a', 'b']]}, {'data': [{'a': {'b': 1}}]},
+                        {'rows': 'abc'}, {'rows': [{'a': 1}]}, {'rows': [['a', ['b']]]},
+                        {'rows': [['a']], 'columns': 'abc'}):
+            with self.subTest(payload=payload):
+                response = self.client.post('/download', json=payload)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
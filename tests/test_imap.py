@@ -0,0 +1,293 @@
+"""
+Offline tests of the IMAP protocol code in main.py.
+
+Each test talks to FakeIMAPServer, a scripted IMAP server on the other end of a
+socketpair, so imaplib's real response parsing and literal framing are exercised
+without a network connection.
+"""
+
+import imaplib
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+import zlib
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import main  # noqa: E402
+
+
+USERID = 'professor@university.edu'
+
+
+class FakeIMAPServer:
+    """
+    Minimal IMAP server for one connection: CAPABILITY, LOGIN, COMPRESS, LIST, SELECT, UID SEARCH, UID FETCH, LOGOUT.
+
+    messages is the INBOX; folders adds other folders by name. UID FETCH commands naming more than max_fetch_uids messages are rejected the
+    way Gmail rejects overly long commands, and those naming any of bad_uids get a BAD response.
+    """
+
+    def __init__(self, sock: socket.socket, messages: dict, uidvalidity: int = 7, max_fetch_uids: int = None,
+                 folders: dict = None, bad_uids: frozenset = frozenset()):
+        self.sock = sock
+        self.folders = {'INBOX': messages, **(folders or {})}  # {folder: {uid: raw message bytes}}
+        self.messages = messages  # The selected folder's messages
+        self.uidvalidity = uidvalidity
+        self.max_fetch_uids = max_fetch_uids
+        self.bad_uids = bad_uids
+        self.fetched = []  # UID sets of the accepted UID FETCH commands
+        self.rejected = 0
+        self._compressor = None
+        self._decompressor = None
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _send(self, data: bytes):
+        if self._compressor is not None:
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.sock.sendall(data)
+
+    def _lines(self):
+        buffer = b''
+        while True:
+            data = self.sock.recv(4096)
+            if not data:
+                return
+            if self._decompressor is not None:
+                data = self._decompressor.decompress(data)
+            buffer += data
+            while b'\r\n' in buffer:
+                line, buffer = buffer.split(b'\r\n', 1)
+                yield line
+
+    def _serve(self):
+        with self.sock:
+            self._respond()
+
+    def _respond(self):
+        self._send(b'* OK [CAPABILITY IMAP4rev1 COMPRESS=DEFLATE] ready\r\n')
+        for line in self._lines():
+            tag, command, *args = line.split(b' ', 2)
+            command = command.upper()
+            if command == b'LOGOUT':
+                self._send(b'* BYE\r\n' + tag + b' OK LOGOUT completed\r\n')
+                return
+            if command == b'CAPABILITY':
+                self._send(b'* CAPABILITY IMAP4rev1 COMPRESS=DEFLATE\r\n' + tag + b' OK CAPABILITY completed\r\n')
+            elif command == b'COMPRESS':
+                self._send(tag + b' OK DEFLATE active\r\n')
+                self._compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+                self._decompressor = zlib.decompressobj(-15)
+            elif command == b'LIST':
+                self._send(b''.join(b'* LIST (\\HasNoChildren) "/" "%s"\r\n' % name.encode() for name in self.folders)
+                           + tag + b' OK LIST completed\r\n')
+            elif command == b'SELECT':
+                self.messages = self.folders[args[0].strip(b'"').decode()]
+                self._send(b'* %d EXISTS\r\n* OK [UIDVALIDITY %d] UIDs valid\r\n%s OK [READ-WRITE] SELECT completed\r\n'
+                           % (len(self.messages), self.uidvalidity, tag))
+            elif command == b'UID' and args[0].upper().startswith(b'SEARCH'):
+                uids = b' '.join(str(uid).encode() for uid in sorted(self.messages))
+                self._send(b'* SEARCH ' + uids + b'\r\n' + tag + b' OK SEARCH completed\r\n')
+            elif command == b'UID' and args[0].upper().startswith(b'FETCH'):
+                self._fetch(tag, args[0].split(b' ')[1])
+            else:  # LOGIN, NOOP, CLOSE
+                self._send(tag + b' OK completed\r\n')
+
+    def _fetch(self, tag: bytes, uid_set: bytes):
+        uids = [int(uid) for uid in uid_set.split(b',')]
+        if self.max_fetch_uids is not None and len(uids) > self.max_fetch_uids:
+            self.rejected += 1
+            self._send(tag + b' BAD Could not parse command: parse error: maximum request size exceeded\r\n')
+            return
+        if self.bad_uids.intersection(uids):
+            self._send(tag + b' BAD Invalid messageset\r\n')
+            return
+        self.fetched.append(uids)
+        response = b''
+        for seq, uid in enumerate(uids, 1):
+            data = self.messages[uid]
+            response += b'* %d FETCH (UID %d RFC822 {%d}\r\n%s)\r\n' % (seq, uid, len(data), data)
+        self._send(response + tag + b' OK FETCH completed\r\n')
+
+
+def make_message(uid: int, size: int = 200) -> bytes:
+    """A distinct raw message whose body spans size bytes over several lines."""
+    header = b'Message-ID: <m%d@example.com>\r\nSubject: message %d\r\n\r\n' % (uid, uid)
+    line = (b'%d ' % uid) * 20 + b'\r\n'
+    return header + (line * (size // len(line) + 1))[:size]
+
+
+def connect(messages: dict, **server_options) -> tuple:
+    """Open a GmailIMAP4_SSL connection to a new FakeIMAPServer, logged in with INBOX selected."""
+    client_sock, server_sock = socket.socketpair()
+    server = FakeIMAPServer(server_sock, messages, **server_options)
+
+    class LoopbackIMAP4(main.GmailIMAP4_SSL):
+        def open(self, host='', port=imaplib.IMAP4_SSL_PORT, timeout=None):
+            self.host = host
+            self.port = port
+            self.sock = client_sock
+            self.file = self.sock.makefile('rb')
+
+    connection = LoopbackIMAP4('imap.example.com')
+    connection.login(USERID, 'password')
+    connection.select('INBOX')
+    return connection, server
+
+
+def fetched_messages(msg_data: list) -> dict:
+    """Map UID to message data in imaplib FETCH response data."""
+    return {int(re.search(rb'UID (\d+)', item[0]).group(1)): item[1] for item in msg_data if isinstance(item, tuple)}
+
+
+class CompressionTest(unittest.TestCase):
+
+    def test_inflates_literals_and_lines_across_read_chunks(self):
+        messages = {uid: make_message(uid, size) for uid, size in ((1, 50), (2, 70000), (3, 1))}
+        connection, _ = connect(messages)
+        self.assertTrue(connection.enable_compression())
+
+        # Tiny socket reads split lines and literals at every possible point
+        for read_size in (1, 2, 3, 7, 64):
+            with self.subTest(read_size=read_size), mock.patch.object(main, 'INFLATE_READ_SIZE', read_size):
+                status, msg_data = connection.uid('FETCH', '1,2,3', '(RFC822)')
+
+                self.assertEqual(status, 'OK')
+                self.assertEqual(fetched_messages(msg_data), messages)
+                # Each literal is followed by exactly the closing parenthesis of its FETCH response
+                self.assertEqual([item for item in msg_data if not isinstance(item, tuple)], [b')'] * len(messages))
+                self.assertEqual(connection.noop()[0], 'OK')
+        connection.logout()
+
+    def test_stays_uncompressed_without_server_support(self):
+        connection, _ = connect({1: make_message(1)})
+        connection.capabilities = ('IMAP4REV1',)
+        connection.untagged_responses.pop('CAPABILITY', None)
+
+        self.assertFalse(connection.enable_compression())
+        self.assertEqual(fetched_messages(connection.uid('FETCH', '1', '(RFC822)')[1]), {1: make_message(1)})
+        connection.logout()
+
+
+class PipelinedFetchTest(unittest.TestCase):
+
+    def test_returns_each_command_status_and_all_data(self):
+        messages = {uid: make_message(uid) for uid in range(1, 8)}
+        connection, server = connect(messages, max_fetch_uids=3)
+        connection.enable_compression()
+
+        results, msg_data = connection.uid_fetch_pipelined([b'1,2', b'3,4,5,6', b'7'], '(RFC822)')
+
+        self.assertEqual(results[0], 'OK')
+        self.assertIsInstance(results[1], imaplib.IMAP4.error)
+        self.assertEqual(results[2], 'OK')
+        self.assertEqual(fetched_messages(msg_data), {uid: messages[uid] for uid in (1, 2, 7)})
+        self.assertEqual(server.fetched, [[1, 2], [7]])
+        # Every tagged response was read, so the connection is still in sync
+        self.assertEqual(connection.noop()[0], 'OK')
+        connection.logout()
+
+
+class GmailIMAPClientFetchTest(unittest.TestCase):
+
+    def make_client(self, messages: dict, cache_path: str = None, **server_options) -> tuple:
+        connection, server = connect(messages, **server_options)
+        client = main.GmailIMAPClient(USERID, 'password', cache_path, pool_size=1)
+        client.connection = connection
+        msg_ids = client._search_folder('INBOX', 'INBOX', datetime(2025, 1, 1), datetime(2025, 1, 31))
+        return client, server, msg_ids
+
+    def test_halves_batches_the_server_rejects_as_too_large(self):
+        messages = {uid: make_message(uid) for uid in range(1, 11)}
+        client, server, msg_ids = self.make_client(messages, max_fetch_uids=3)
+
+        fetched = dict(client._fetch_batched(msg_ids, '(RFC822)'))
+        client.close()
+
+        self.assertEqual({int(uid): data for uid, data in fetched.items()}, messages)
+        self.assertGreater(server.rejected, 0)
+        self.assertTrue(all(len(uids) <= 3 for uids in server.fetched))
+
+    def test_skips_batches_the_server_rejects(self):
+        messages = {uid: make_message(uid) for uid in range(1, 11)}
+        client, server, msg_ids = self.make_client(messages, bad_uids={5})
+
+        # One batch per group, so the rejected batch is fetched on its own
+        with mock.patch.object(main, 'FETCH_BATCH_SIZE', 3), mock.patch.object(main, 'IMAP_PIPELINE_DEPTH', 1), \
+                self.assertLogs(main.logger, 'WARNING') as logs:
+            fetched = dict(client._fetch_batched(msg_ids, '(RFC822)'))
+        self.assertEqual(client.connection.noop()[0], 'OK')
+        client.close()
+
+        self.assertEqual({int(uid): data for uid, data in fetched.items()},
+                         {uid: data for uid, data in messages.items() if uid not in (4, 5, 6)})
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('4-6', logs.output[0])
+
+    def test_cache_is_keyed_by_uidvalidity(self):
+        messages = {uid: make_message(uid) for uid in range(1, 5)}
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, 'cache.db')
+
+            client, server, msg_ids = self.make_client(messages, cache_path)
+            first = dict(client._fetch_cached(msg_ids, '(RFC822)', 'message'))
+            client.close()
+            self.assertEqual(sum(len(uids) for uids in server.fetched), 4)
+
+            # Same UIDVALIDITY: everything comes from the cache, new messages are fetched
+            messages[5] = make_message(5)
+            client, server, msg_ids = self.make_client(messages, cache_path)
+            second = dict(client._fetch_cached(msg_ids, '(RFC822)', 'message'))
+            client.close()
+            self.assertEqual(server.fetched, [[5]])
+            self.assertEqual(second, {**first, b'5': messages[5]})
+
+            # New UIDVALIDITY: the cached UIDs no longer identify the same messages
+            client, server, msg_ids = self.make_client(messages, cache_path, uidvalidity=8)
+            third = dict(client._fetch_cached(msg_ids, '(RFC822)', 'message'))
+            client.close()
+            self.assertEqual(sorted(uid for uids in server.fetched for uid in uids), [1, 2, 3, 4, 5])
+            self.assertEqual(third, second)
+
+
+class PairCandidatesTest(unittest.TestCase):
+
+    def test_selects_originals_by_folded_subject(self):
+        subject = b'Question about the schedule of the final project review meeting next week'
+        inbox = {
+            # The original's long Subject is folded across two header lines
+            1: b'From: student@example.com\r\nTo: %s\r\nMessage-ID: <q1@example.com>\r\n'
+               b'Date: Fri, 10 Jan 2025 09:00:00 +0000\r\nSubject: %s\r\n %s\r\n\r\nbody\r\n'
+               % (USERID.encode(), subject[:48], subject[49:]),
+            2: b'From: news@example.com\r\nTo: %s\r\nMessage-ID: <n1@example.com>\r\n'
+               b'Date: Fri, 10 Jan 2025 10:00:00 +0000\r\nSubject: newsletter\r\n\r\nbody\r\n' % USERID.encode(),
+        }
+        sent = {
+            # The reply answers by subject only, without In-Reply-To or References
+            1: b'From: %s\r\nTo: student@example.com\r\nMessage-ID: <a1@example.com>\r\n'
+               b'Date: Fri, 10 Jan 2025 14:00:00 +0000\r\nSubject: Re: %s\r\n\r\nanswer\r\n'
+               % (USERID.encode(), subject),
+        }
+        connection, _ = connect(inbox, folders={'[Gmail]/Sent Mail': sent})
+        client = main.GmailIMAPClient(USERID, 'password', pool_size=1)
+        client.connection = connection
+
+        emails = client.fetch_pair_candidates(datetime(2025, 1, 1), datetime(2025, 1, 31))
+        client.close()
+
+        self.assertEqual(sorted(str(msg['Message-ID']) for msg in emails), ['<a1@example.com>', '<q1@example.com>'])
+        self.assertEqual(client.messages_in_range, 3)
+        pairs = main.EmailFilter(USERID).find_email_pairs(emails)
+        self.assertEqual([(str(p.request['Message-ID']), str(p.response['Message-ID'])) for p in pairs],
+                         [('<q1@example.com>', '<a1@example.com>')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Tests of the subject index used to pair replies with their originals in main.py.
+"""
+
+import email
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+from email.policy import default
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import main  # noqa: E402
+
+
+def make_indexed(message_id: str, date: str) -> main.IndexedMessage:
+    """An IndexedMessage with the given Message-ID and Date header."""
+    raw = b'Message-ID: <%s>\r\nDate: %s\r\nSubject: question\r\n\r\nbody\r\n' % (message_id.encode(), date.encode())
+    return main.IndexedMessage(email.message_from_bytes(raw, policy=default))
+
+
+class MessagesByDateTest(unittest.TestCase):
+
+    def test_returns_latest_earlier_message(self):
+        messages = main.MessagesByDate()
+        for message_id, date in (('b', 'Fri, 10 Jan 2025 11:00:00 +0000'), ('a', 'Fri, 10 Jan 2025 09:00:00 +0000'),
+                                 ('c', 'Fri, 10 Jan 2025 13:00:00 +0000')):
+            messages.append(make_indexed(message_id, date))
+
+        found = messages.latest_before(datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc))
+        self.assertEqual(str(found.msg['Message-ID']), '<b>')
+        self.assertIsNone(messages.latest_before(datetime(2025, 1, 10, 9, 0, tzinfo=timezone.utc)))
+
+    def test_equal_dates_return_the_first_indexed(self):
+        messages = main.MessagesByDate()
+        # Same instant, written in two time zones
+        for message_id, date in (('first', 'Fri, 10 Jan 2025 09:00:00 +0000'),
+                                 ('second', 'Fri, 10 Jan 2025 18:00:00 +0900'),
+                                 ('third', 'Fri, 10 Jan 2025 09:00:00 +0000')):
+            messages.append(make_indexed(message_id, date))
+
+        found = messages.latest_before(datetime(2025, 1, 10, 12, 0, tzinfo=timezone.utc))
+        self.assertEqual(str(found.msg['Message-ID']), '<first>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,10 @@ WSGI entry point for production deployment.
 This file can be used with WSGI servers like Gunicorn or uWSGI.
 
 Example usage with Gunicorn:
-    gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+    gunicorn -w 1 -k gthread --threads 64 -b 0.0.0.0:5000 wsgi:app
+
+Log streams and request status are kept in process memory, so run a single
+worker process and scale with threads (each SSE client holds one thread).
 """
 
 from app import app